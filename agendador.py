@@ -0,0 +1,115 @@
+"""
+agendador.py - Agendador de tarefas periódicas baseado em heap
+
+Mantém as próximas execuções em uma fila de prioridade ordenada por
+time.monotonic(). Quem espera dorme exatamente até a próxima tarefa
+vencer e é acordado antes se uma tarefa for adicionada ou removida.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+class Agendador:
+    """Fila de prioridade de tarefas identificadas por chave.
+    
+    Cada chave tem no máximo um agendamento válido: reagendar ou remover
+    apenas invalida a entrada antiga, que é descartada quando chega ao topo.
+    """
+    
+    def __init__(self):
+        self._heap = []          # (instante, sequencia, chave)
+        self._agendadas = {}     # chave -> sequência do agendamento válido
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+    
+    def agendar(self, chave, atraso=0.0):
+        """(Re)agenda a chave para daqui a `atraso` segundos"""
+        with self._condicao:
+            sequencia = next(self._sequencia)
+            instante = time.monotonic() + max(0.0, atraso)
+            self._agendadas[chave] = sequencia
+            heapq.heappush(self._heap, (instante, sequencia, chave))
+            self._compactar()
+            
+            # Só precisa acordar quem espera se virou a próxima tarefa
+            if self._heap[0][1] == sequencia:
+                self._condicao.notify_all()
+    
+    def remover(self, chave):
+        """Remove o agendamento da chave (se houver)"""
+        with self._condicao:
+            if self._agendadas.pop(chave, None) is not None:
+                self._condicao.notify_all()
+    
+    def acordar(self):
+        """Acorda quem está em aguardar() para reavaliar a condição de parada"""
+        with self._condicao:
+            self._condicao.notify_all()
+    
+    def proxima(self):
+        """Segundos até a próxima tarefa (0 se já venceu), ou None se vazio"""
+        with self._condicao:
+            self._descartar_invalidas()
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.monotonic())
+    
+    def retirar_vencidas(self):
+        """Remove e retorna as chaves vencidas, sem bloquear"""
+        with self._condicao:
+            return self._retirar_vencidas(time.monotonic())
+    
+    def aguardar(self, continuar=None, timeout=None):
+        """Bloqueia até haver tarefas vencidas e as retorna (removidas da agenda).
+        
+        Retorna lista vazia se `continuar()` ficar falso (após acordar())
+        ou se o timeout expirar.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while continuar is None or continuar():
+                agora = time.monotonic()
+                vencidas = self._retirar_vencidas(agora)
+                if vencidas:
+                    return vencidas
+                
+                espera = self._heap[0][0] - agora if self._heap else None
+                if limite is not None:
+                    restante = limite - agora
+                    if restante <= 0:
+                        break
+                    espera = restante if espera is None else min(espera, restante)
+                self._condicao.wait(espera)
+        return []
+    
+    def _retirar_vencidas(self, agora):
+        vencidas = []
+        heap = self._heap
+        while heap:
+            self._descartar_invalidas()
+            if not heap or heap[0][0] > agora:
+                break
+            _, _, chave = heapq.heappop(heap)
+            del self._agendadas[chave]
+            vencidas.append(chave)
+        return vencidas
+    
+    def _descartar_invalidas(self):
+        heap = self._heap
+        while heap and self._agendadas.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+    
+    def _compactar(self):
+        # Muitas entradas invalidadas (reagendamentos): reconstrói o heap
+        if len(self._heap) > 2 * len(self._agendadas) + 64:
+            self._heap = [item for item in self._heap if self._agendadas.get(item[2]) == item[1]]
+            heapq.heapify(self._heap)
+    
+    def __contains__(self, chave):
+        with self._condicao:
+            return chave in self._agendadas
+    
+    def __len__(self):
+        with self._condicao:
+            return len(self._agendadas)
\ No newline at end of file
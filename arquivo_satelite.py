@@ -0,0 +1,186 @@
+"""
+arquivo_satelite.py - Histórico circular de quadros de satélite em arquivo mapeado em memória
+
+Um arquivo por região guarda os últimos `capacidade` quadros (imagem
+bruta RGB e imagem anotada BGR) em np.memmap:
+    
+    [cabeçalho 4 KiB][índice: capacidade x DTYPE_INDICE][quadros: capacidade x 2 x altura x largura x 3]
+
+Cabeçalho e índice ficam no próprio arquivo, então o histórico sobrevive
+a reinícios; a memória usada é só a das páginas acessadas (cache do SO),
+qualquer que seja o tamanho do histórico. O espaço em disco é fixo: o
+arquivo já é criado com o tamanho de todas as posições.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+MAGICO = b"METAPISAT"
+VERSAO = 1
+TAMANHO_CABECALHO = 4096
+BRUTO, ANOTADO = 0, 1  # posição de cada imagem dentro do quadro
+
+DTYPE_CABECALHO = np.dtype([
+    ("magico", "S9"), ("versao", "<u2"),
+    ("altura", "<u4"), ("largura", "<u4"), ("capacidade", "<u4"),
+    ("proximo", "<u4"),    # posição a ser escrita no próximo quadro
+    ("sequencia", "<u8"),  # último número de sequência gravado
+])
+
+# Uma entrada por posição; sequencia 0 = posição vazia (ou gravação interrompida)
+DTYPE_INDICE = np.dtype([
+    ("sequencia", "<u8"), ("instante", "<f8"), ("tempestades", "u1"), ("chuva", "u1"),
+])
+
+def _alinhar(tamanho, bloco=4096):
+    return -(-tamanho // bloco) * bloco
+
+class ArquivoQuadros:
+    """Buffer circular dos últimos quadros de uma região, persistido em disco.
+    
+    quadro() retorna views do memmap (sem cópia), que adicionar() pode
+    sobrescrever; copiar() lê quadro e registro juntos, sob o lock. O arquivo
+    é recriado se o tamanho das imagens ou a capacidade mudarem.
+    """
+    
+    def __init__(self, caminho, capacidade=12):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        self._cabecalho = None
+        self._indice = None
+        self._quadros = None
+        if os.path.exists(caminho):
+            try:
+                self._abrir()
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Histórico de satélite inválido ({caminho}): {e}; será recriado")
+                self._fechar_mapas()
+    
+    def _abrir(self):
+        cabecalho = np.fromfile(self.caminho, DTYPE_CABECALHO, count=1)
+        if len(cabecalho) != 1 or cabecalho["magico"][0] != MAGICO or cabecalho["versao"][0] != VERSAO:
+            raise ValueError("cabeçalho desconhecido")
+        if cabecalho["capacidade"][0] != self.capacidade:
+            raise ValueError("capacidade diferente")
+        self._mapear(int(cabecalho["altura"][0]), int(cabecalho["largura"][0]))
+    
+    def _mapear(self, altura, largura):
+        inicio_quadros = TAMANHO_CABECALHO + _alinhar(self.capacidade * DTYPE_INDICE.itemsize)
+        forma = (self.capacidade, 2, altura, largura, 3)
+        tamanho = inicio_quadros + int(np.prod(forma))
+        if os.path.getsize(self.caminho) != tamanho:
+            raise ValueError("tamanho do arquivo não confere")
+        self._cabecalho = np.memmap(self.caminho, DTYPE_CABECALHO, "r+", offset=0, shape=(1,))
+        self._indice = np.memmap(self.caminho, DTYPE_INDICE, "r+", offset=TAMANHO_CABECALHO,
+                                 shape=(self.capacidade,))
+        self._quadros = np.memmap(self.caminho, np.uint8, "r+", offset=inicio_quadros, shape=forma)
+    
+    def _criar(self, altura, largura):
+        self._fechar_mapas()
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        
+        # Tamanho final já na criação (no NTFS, truncate reserva e zera tudo; só em sistemas
+        # com arquivos esparsos, como ext4, o disco é ocupado conforme os quadros são gravados)
+        inicio_quadros = TAMANHO_CABECALHO + _alinhar(self.capacidade * DTYPE_INDICE.itemsize)
+        with open(self.caminho, "wb") as f:
+            f.truncate(inicio_quadros + self.capacidade * 2 * altura * largura * 3)
+        self._mapear(altura, largura)
+        self._cabecalho[0] = (MAGICO, VERSAO, altura, largura, self.capacidade, 0, 0)
+        self._cabecalho.flush()
+    
+    def _fechar_mapas(self):
+        self._cabecalho = self._indice = self._quadros = None
+    
+    def adicionar(self, bruto_rgb, anotado_bgr, instante=None, tempestades=False, chuva=False):
+        """Grava o quadro na posição mais antiga"""
+        bruto_rgb = np.asarray(bruto_rgb)
+        altura, largura = bruto_rgb.shape[:2]
+        with self._lock:
+            if self._quadros is None or self._quadros.shape[2:4] != (altura, largura):
+                self._criar(altura, largura)
+            
+            posicao = int(self._cabecalho["proximo"][0])
+            sequencia = int(self._cabecalho["sequencia"][0]) + 1
+            
+            # Invalida a posição antes de sobrescrever: uma gravação interrompida não vira quadro
+            self._indice["sequencia"][posicao] = 0
+            self._indice.flush()
+            # Grava por um mapa só da posição: o flush sincroniza ela, não o arquivo inteiro
+            quadro = self._mapa_posicao(posicao)
+            quadro[BRUTO] = bruto_rgb
+            quadro[ANOTADO] = anotado_bgr
+            quadro.flush()
+            del quadro
+            
+            self._indice[posicao] = (sequencia, time.time() if instante is None else instante, tempestades, chuva)
+            self._cabecalho["proximo"] = (posicao + 1) % self.capacidade
+            self._cabecalho["sequencia"] = sequencia
+            self._indice.flush()
+            self._cabecalho.flush()
+    
+    def _mapa_posicao(self, posicao):
+        forma = self._quadros.shape[1:]
+        deslocamento = self._quadros.offset + posicao * int(np.prod(forma))
+        return np.memmap(self.caminho, np.uint8, "r+", offset=deslocamento, shape=forma)
+    
+    def posicoes(self):
+        """Posições com quadro gravado, do mais antigo para o mais recente"""
+        with self._lock:
+            return self._posicoes()
+    
+    def _posicoes(self):
+        if self._indice is None:
+            return []
+        sequencias = np.array(self._indice["sequencia"])
+        gravadas = np.flatnonzero(sequencias)
+        return gravadas[np.argsort(sequencias[gravadas])].tolist()
+    
+    def registro(self, posicao):
+        """Instante (epoch), tempestades e chuva do quadro da posição"""
+        with self._lock:
+            return self._registro(posicao)
+    
+    def _registro(self, posicao):
+        entrada = self._indice[posicao]
+        return {
+            "instante": float(entrada["instante"]),
+            "tempestades": bool(entrada["tempestades"]),
+            "chuva": bool(entrada["chuva"])
+        }
+    
+    def quadro(self, posicao, anotado=True):
+        """View (altura, largura, 3) do quadro: BGR anotado ou RGB bruto"""
+        return self._quadros[posicao, ANOTADO if anotado else BRUTO]
+    
+    def copiar(self, indice, anotado=True):
+        """(cópia do quadro, registro) do `indice`-ésimo quadro gravado (0 = mais antigo), ou None"""
+        with self._lock:
+            posicoes = self._posicoes()
+            if not 0 <= indice < len(posicoes):
+                return None
+            posicao = posicoes[indice]
+            return self._quadros[posicao, ANOTADO if anotado else BRUTO].copy(), self._registro(posicao)
+    
+    def estatisticas(self):
+        with self._lock:
+            forma = None if self._quadros is None else tuple(self._quadros.shape[2:4])
+        return {
+            "arquivo": self.caminho,
+            "capacidade": self.capacidade,
+            "quadros": len(self.posicoes()),
+            "tamanho_imagem": forma
+        }
+    
+    def fechar(self):
+        with self._lock:
+            if self._quadros is not None:
+                self._quadros.flush()
+            self._fechar_mapas()
+    
+    def __len__(self):
+        return len(self.posicoes())
\ No newline at end of file
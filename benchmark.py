@@ -0,0 +1,315 @@
+"""
+benchmark.py - Medições de desempenho dos interpretadores METAR/TAF e do pipeline de satélite
+
+Uso: python benchmark.py [nome ...]   (sem nomes, roda todos)
+"""
+import contextlib
+import io
+import random
+import re
+import sys
+import time
+
+from metapi import TAFInterpreter
+
+def _cronometrar(funcao, repeticoes=3):
+    """Retorna o melhor tempo (s) entre as repetições"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor
+
+def _gerar_blocos_taf(quantidade, semente=42):
+    """Gera grupos de mudança de TAF sintéticos (um por item)"""
+    aleatorio = random.Random(semente)
+    tipos = ['BECMG', 'TEMPO', 'PROB30', 'PROB40 TEMPO', 'FM']
+    ventos = ['09005KT', '12010G22KT', 'VRB03KT', '00000KT', '33015KT']
+    visibilidades = ['9999', '4000', '0800', '2SM', 'P6SM', 'CAVOK']
+    tempos = ['-RA', 'RA', '+RA', 'TSRA', '+TSRA', 'BR', 'FG', 'VCSH', 'SHRA', 'HZ', 'TS', 'DZ', 'NSW']
+    nuvens = ['FEW015', 'SCT030', 'BKN010', 'OVC008', 'FEW040CB', 'VV002']
+    
+    blocos = []
+    for _ in range(quantidade):
+        dia = aleatorio.randint(1, 28)
+        partes = [
+            aleatorio.choice(tipos),
+            f"{dia:02d}{aleatorio.randint(0, 23):02d}/{dia:02d}{aleatorio.randint(0, 23):02d}",
+            aleatorio.choice(ventos),
+            aleatorio.choice(visibilidades)
+        ]
+        partes += aleatorio.sample(tempos, aleatorio.randint(0, 3))
+        partes += aleatorio.sample(nuvens, aleatorio.randint(0, 3))
+        blocos.append(' '.join(partes))
+    return blocos
+
+def bench_condicoes_taf(quantidade=20000):
+    """_extrair_condicoes: alternância única x uma regex por código"""
+    taf = TAFInterpreter()
+    blocos = _gerar_blocos_taf(quantidade)
+    
+    def por_codigo(texto):
+        # Implementação anterior: uma busca r'\bCODIGO\b' para cada código
+        condicoes = []
+        for codigo, descricao in taf.weather_descriptions.items():
+            if re.search(r'\b' + re.escape(codigo) + r'\b', texto):
+                condicoes.append(descricao)
+        return ", ".join(condicoes) if condicoes else "Condições normais"
+    
+    iguais = all(por_codigo(bloco) == taf._extrair_condicoes(bloco) for bloco in blocos)
+    tempo_antigo = _cronometrar(lambda: [por_codigo(bloco) for bloco in blocos])
+    tempo_novo = _cronometrar(lambda: [taf._extrair_condicoes(bloco) for bloco in blocos])
+    
+    print(f"condicoes_taf: {quantidade} grupos | por código {tempo_antigo:.3f}s | "
+          f"alternância {tempo_novo:.3f}s | {tempo_antigo / tempo_novo:.1f}x | "
+          f"resultados iguais: {iguais}")
+
+def _gerar_tafs(quantidade, semente=42):
+    """Gera TAFs completos (cabeçalho + grupos de mudança, um por linha)"""
+    blocos = _gerar_blocos_taf(quantidade * 4, semente)
+    tafs = []
+    for i in range(quantidade):
+        cabecalho = f"TAF SB{i % 26 + 65:c}{i // 26 % 26 + 65:c} 181100Z 1812/1912 09005KT 9999 SCT030"
+        # PROB40 sozinho na linha força a junção de linhas (_corrigir_quebras_linha)
+        tafs.append('\n'.join([cabecalho, 'PROB40'] + blocos[i * 4:i * 4 + 4]))
+    return tafs
+
+def bench_trace_taf(quantidade=5000):
+    """interpretar_taf com trace desligado x prints síncronos (comportamento anterior)"""
+    tafs = _gerar_tafs(quantidade)
+    
+    # Trace desligado: conta quantas vezes o trace chegaria a ser chamado
+    desligado = TAFInterpreter()
+    chamadas = []
+    desligado._trace = lambda mensagem, *args: chamadas.append(mensagem)
+    desligado._interpretar_taf(tafs[0])  # Aquece tabelas de tokens
+    tempo_desligado = _cronometrar(lambda: [desligado._interpretar_taf(taf) for taf in tafs])
+    
+    # Comportamento anterior: print síncrono a cada chamada
+    impresso = TAFInterpreter()
+    impresso.trace = True
+    impresso._trace = lambda mensagem, *args: print(mensagem % args)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tempo_impresso = _cronometrar(lambda: [impresso._interpretar_taf(taf) for taf in tafs])
+    
+    print(f"trace_taf: {quantidade} TAFs | trace desligado {tempo_desligado:.3f}s "
+          f"({len(chamadas)} chamadas de trace) | prints {tempo_impresso:.3f}s | "
+          f"{tempo_impresso / tempo_desligado:.2f}x")
+
+def _gerar_quadro_satelite(largura=1800, altura=1800, semente=42):
+    """Quadro RGB sintético no tamanho de uma imagem do INMET: fundo, chuva (amarelo) e tempestades (vermelho)"""
+    import numpy as np
+    
+    aleatorio = np.random.default_rng(semente)
+    quadro = aleatorio.integers(0, 140, (altura, largura, 3), dtype=np.uint8)
+    for _ in range(60):
+        x, y = aleatorio.integers(0, largura - 120), aleatorio.integers(0, altura - 120)
+        w, h = aleatorio.integers(10, 120, size=2)
+        cor = (230, 220, 40) if aleatorio.random() < 0.6 else (220, 40, 30)
+        quadro[y:y + h, x:x + w] = cor
+    return quadro
+
+def bench_cores_satelite(repeticoes=20):
+    """detectar_cores: mapa de classes com cv2.inRange x seis máscaras booleanas"""
+    import numpy as np
+    from satelite_utils import detectar_cores
+    
+    quadro = _gerar_quadro_satelite()
+    
+    def mascaras_booleanas(imagem):
+        # Implementação anterior
+        img_np = np.array(imagem)
+        mascara_vermelho = (img_np[:, :, 0] > 180) & (img_np[:, :, 1] < 90) & (img_np[:, :, 2] < 90)
+        mascara_amarelo = (img_np[:, :, 0] > 150) & (img_np[:, :, 1] > 152) & (img_np[:, :, 2] < 98)
+        return mascara_vermelho, mascara_amarelo
+    
+    antigo = mascaras_booleanas(quadro)
+    novo = detectar_cores(quadro)
+    iguais = all((a == b).all() for a, b in zip(antigo, novo))
+    tempo_antigo = _cronometrar(lambda: [mascaras_booleanas(quadro) for _ in range(repeticoes)])
+    tempo_novo = _cronometrar(lambda: [detectar_cores(quadro) for _ in range(repeticoes)])
+    
+    altura, largura = quadro.shape[:2]
+    print(f"cores_satelite: {repeticoes} quadros {largura}x{altura} | máscaras {tempo_antigo / repeticoes * 1000:.1f}ms | "
+          f"inRange {tempo_novo / repeticoes * 1000:.1f}ms | {tempo_antigo / tempo_novo:.1f}x | "
+          f"resultados iguais: {iguais}")
+
+def _gerar_quadro_celulas(quantidade=400, largura=1800, altura=1800, semente=42):
+    """Quadro RGB com `quantidade` células de tempestade isoladas (uma caixa de alerta cada)"""
+    import numpy as np
+    
+    aleatorio = np.random.default_rng(semente)
+    quadro = aleatorio.integers(0, 140, (altura, largura, 3), dtype=np.uint8)
+    colunas = int(np.ceil(np.sqrt(quantidade)))
+    passo_x, passo_y = largura // colunas, altura // colunas
+    for i in range(quantidade):
+        x = (i % colunas) * passo_x + int(aleatorio.integers(0, 10))
+        y = (i // colunas) * passo_y + int(aleatorio.integers(0, 10))
+        w, h = aleatorio.integers(25, min(passo_x, passo_y) - 20, size=2)
+        quadro[y:y + h, x:x + w] = (220, 40, 30)
+    return quadro
+
+def _gerar_quadro_proximas(quantidade=60, lado=400, semente=7):
+    """Quadro RGB com células de tempestade próximas: o glifo de uma cruza a caixa de outra"""
+    import numpy as np
+    
+    aleatorio = np.random.default_rng(semente)
+    quadro = aleatorio.integers(0, 140, (lado, lado, 3), dtype=np.uint8)
+    for _ in range(quantidade):
+        x, y = aleatorio.integers(0, lado - 30, size=2)
+        w, h = aleatorio.integers(12, 30, size=2)
+        quadro[y:y + h, x:x + w] = (220, 40, 30)
+    return quadro
+
+def bench_alerta_satelite(celulas=400, repeticoes=5):
+    """emitir_alerta: glifos em cache desenhados no BGR x fonte e ImageDraw por contorno"""
+    import cv2
+    import emoji
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+    from satelite_utils import FONTE_EMOJI, TAMANHO_EMOJI, detectar_cores, emitir_alerta
+    
+    quadro = _gerar_quadro_celulas(celulas)
+    mascara_vermelho, mascara_amarelo = detectar_cores(quadro)
+    
+    def carregar_fonte():
+        try:
+            return ImageFont.truetype(FONTE_EMOJI, TAMANHO_EMOJI)
+        except OSError:
+            return ImageFont.load_default(TAMANHO_EMOJI)
+    
+    def alerta_por_contorno(imagem, mascara):
+        # Implementação anterior (só o ramo de tempestade): fonte e Draw novos a cada contorno
+        img_pil = Image.fromarray(imagem)
+        mascara_dilatada = cv2.dilate(mascara.view(np.uint8), np.ones((6, 6), np.uint8), iterations=1)
+        contornos, _ = cv2.findContours(mascara_dilatada, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contorno in contornos:
+            x, y, w, h = cv2.boundingRect(contorno)
+            if w * h < 400:
+                continue
+            ImageDraw.Draw(img_pil).rectangle([(x, y), (x + w, y + h)], outline=(255, 0, 0), width=6)
+            ImageDraw.Draw(img_pil).text((x + w / 2 - 16, y + h / 2 - 16), emoji.emojize(":cloud_with_lightning_and_rain:"),
+                                         font=carregar_fonte(), fill=(255, 255, 255))
+        return cv2.cvtColor(np.asarray(img_pil), cv2.COLOR_RGB2BGR)
+    
+    # Igualdade também com células próximas (ordem em que caixas e glifos se sobrepõem)
+    iguais = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        for teste in (quadro, _gerar_quadro_proximas()):
+            vermelho, amarelo = detectar_cores(teste)
+            iguais &= bool((alerta_por_contorno(teste, vermelho) == emitir_alerta(teste, vermelho, amarelo)).all())
+    tempo_antigo = _cronometrar(lambda: [alerta_por_contorno(quadro, mascara_vermelho) for _ in range(repeticoes)])
+    tempo_novo = _cronometrar(lambda: [emitir_alerta(quadro, mascara_vermelho, mascara_amarelo) for _ in range(repeticoes)])
+    
+    print(f"alerta_satelite: {celulas} células | por contorno {tempo_antigo / repeticoes * 1000:.1f}ms | "
+          f"em cache {tempo_novo / repeticoes * 1000:.1f}ms | {tempo_antigo / tempo_novo:.1f}x | "
+          f"resultados iguais: {iguais}")
+
+def bench_celulas_satelite(quantidades=(100, 1000, 5000, 20000), repeticoes=5):
+    """extrair_celulas (connectedComponentsWithStats) x findContours + laço por contorno"""
+    import cv2
+    import numpy as np
+    from satelite_utils import KERNEL_CELULAS, detectar_cores, extrair_celulas
+    
+    def celulas_por_contorno(mascaras):
+        # Caminho anterior: um laço Python por contorno de cada classe
+        celulas = []
+        for classe, mascara in mascaras:
+            mascara_dilatada = cv2.dilate(mascara.view(np.uint8), KERNEL_CELULAS, iterations=1)
+            contornos, _ = cv2.findContours(mascara_dilatada, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for contorno in contornos:
+                celulas.append((*cv2.boundingRect(contorno), classe))
+        return celulas
+    
+    for quantidade in quantidades:
+        # Grade regular de pontos vermelhos: uma célula por ponto
+        quadro = np.zeros((1800, 1800, 3), np.uint8)
+        passo = max(8, int(1800 / np.sqrt(quantidade)))
+        quadro[::passo, ::passo] = (220, 40, 30)
+        mascara_vermelho, mascara_amarelo = detectar_cores(quadro)
+        mascaras = [(2, mascara_vermelho), (1, mascara_amarelo)]
+        
+        iguais = len(celulas_por_contorno(mascaras)) == len(extrair_celulas(mascara_vermelho, mascara_amarelo))
+        tempo_antigo = _cronometrar(lambda: [celulas_por_contorno(mascaras) for _ in range(repeticoes)])
+        tempo_novo = _cronometrar(lambda: [extrair_celulas(mascara_vermelho, mascara_amarelo) for _ in range(repeticoes)])
+        print(f"celulas_satelite: {len(extrair_celulas(mascara_vermelho, mascara_amarelo))} células | "
+              f"contornos {tempo_antigo / repeticoes * 1000:.1f}ms | componentes {tempo_novo / repeticoes * 1000:.1f}ms | "
+              f"{tempo_antigo / tempo_novo:.1f}x | mesma contagem: {iguais}")
+
+def bench_incremental_satelite(quadros=20, blocos_alterados=6):
+    """DetectorIncremental x detecção completa em quadros com poucas áreas alteradas"""
+    import numpy as np
+    from satelite_utils import DetectorIncremental, classificar_cores, extrair_celulas
+    
+    aleatorio = np.random.default_rng(42)
+    sequencia = [_gerar_quadro_satelite()]
+    for _ in range(quadros):
+        quadro = sequencia[-1].copy()
+        for _ in range(blocos_alterados):
+            x, y = aleatorio.integers(0, 1700, size=2)
+            quadro[y:y + 60, x:x + 60] = (220, 40, 30) if aleatorio.random() < 0.5 else (230, 220, 40)
+        sequencia.append(quadro)
+    
+    def completo():
+        for quadro in sequencia[1:]:
+            classes = classificar_cores(quadro)
+            extrair_celulas(classes == 2, classes == 1)
+    
+    def incremental():
+        detector = DetectorIncremental()
+        detector.detectar(sequencia[0])
+        for quadro in sequencia[1:]:
+            detector.detectar(quadro)
+        return detector
+    
+    tempo_completo = _cronometrar(completo)
+    tempo_incremental = _cronometrar(incremental)
+    estatisticas = incremental().estatisticas()
+    print(f"incremental_satelite: {quadros} quadros 1800x1800, {blocos_alterados} áreas alteradas por quadro | "
+          f"completo {tempo_completo / quadros * 1000:.1f}ms | incremental {tempo_incremental / quadros * 1000:.1f}ms | "
+          f"{tempo_completo / tempo_incremental:.1f}x | blocos refeitos {estatisticas['fracao_blocos_refeitos']:.1%}")
+
+def bench_processos_satelite(regioes=8, processos=2):
+    """Análise de várias regiões: pool de processos com memória compartilhada x sequencial no processo"""
+    from processamento_satelite import ProcessamentoSatelite
+    from satelite_utils import detectar_cores, emitir_alerta, extrair_celulas
+    
+    quadros = [_gerar_quadro_satelite(semente=semente) for semente in range(regioes)]
+    
+    def sequencial():
+        for quadro in quadros:
+            celulas = extrair_celulas(*detectar_cores(quadro))
+            emitir_alerta(quadro, None, None, celulas)
+    
+    processamento = ProcessamentoSatelite(processos, incremental=False)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            processamento.processar("aquecimento", quadros[0])
+        
+        def em_processos():
+            futuros = [processamento.submeter(str(i), quadro) for i, quadro in enumerate(quadros)]
+            return [futuro.result() for futuro in futuros]
+        
+        tempo_sequencial = _cronometrar(sequencial)
+        tempo_processos = _cronometrar(em_processos)
+    finally:
+        processamento.encerrar(esperar=True)
+    
+    print(f"processos_satelite: {regioes} regiões 1800x1800 | sequencial {tempo_sequencial * 1000:.0f}ms | "
+          f"{processos} processos {tempo_processos * 1000:.0f}ms | {tempo_sequencial / tempo_processos:.1f}x")
+
+BENCHMARKS = {
+    'condicoes_taf': bench_condicoes_taf,
+    'trace_taf': bench_trace_taf,
+    'cores_satelite': bench_cores_satelite,
+    'alerta_satelite': bench_alerta_satelite,
+    'celulas_satelite': bench_celulas_satelite,
+    'incremental_satelite': bench_incremental_satelite,
+    'processos_satelite': bench_processos_satelite,
+}
+
+if __name__ == '__main__':
+    for nome in sys.argv[1:] or list(BENCHMARKS):
+        BENCHMARKS[nome]()
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+cache_utils.py - Caches em memória (LRU), cache de produtos METAR/TAF com validade
+e cache de quadros de satélite por conteúdo
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+class CacheLRU:
+    """Dicionário com limite de itens que descarta o menos usado recentemente"""
+    
+    def __init__(self, maximo=1000):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chave, padrao=None):
+        """Retorna o valor e marca a chave como usada recentemente"""
+        with self._lock:
+            if chave not in self._itens:
+                return padrao
+            self._itens.move_to_end(chave)
+            return self._itens[chave]
+    
+    def put(self, chave, valor):
+        """Guarda o valor, descartando o item mais antigo se passar do limite"""
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+    
+    def pop(self, chave, padrao=None):
+        """Remove a chave e retorna seu valor"""
+        with self._lock:
+            return self._itens.pop(chave, padrao)
+    
+    def items(self):
+        """Cópia dos itens, do mais antigo para o mais recente"""
+        with self._lock:
+            return list(self._itens.items())
+    
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+    
+    def __contains__(self, chave):
+        with self._lock:
+            return chave in self._itens
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._itens)
+
+class CacheProdutos:
+    """Cache de respostas METAR/TAF por (produto, ICAO) com ETag/Last-Modified e validade.
+    
+    Cada entrada guarda o texto do relatório, os validadores HTTP para GET
+    condicional e o instante (epoch) em que deixa de ser considerada atual.
+    """
+    
+    def __init__(self, maximo=2000, arquivo=None):
+        self.arquivo = arquivo
+        self._entradas = CacheLRU(maximo)
+        self._lock = threading.Lock()
+        self._lock_arquivo = threading.Lock()  # salvar() é chamado de mais de uma thread
+        self.acertos = 0
+        self.revalidados = 0
+        self.baixados = 0
+        self._carregar()
+    
+    def obter(self, produto, chave):
+        """Retorna a entrada de (produto, chave) ou None"""
+        return self._entradas.get((produto, chave))
+    
+    def obter_atual(self, produto, chave, agora=None):
+        """Retorna o texto se a entrada ainda estiver dentro da validade"""
+        entrada = self.obter(produto, chave)
+        if entrada and entrada.get("texto") and entrada["expira_em"] > (agora or time.time()):
+            with self._lock:
+                self.acertos += 1
+            return entrada["texto"]
+        return None
+    
+    def validadores(self, produto, chave):
+        """Cabeçalhos para GET condicional (If-None-Match / If-Modified-Since)"""
+        entrada = self.obter(produto, chave)
+        headers = {}
+        if entrada:
+            if entrada.get("etag"):
+                headers["If-None-Match"] = entrada["etag"]
+            if entrada.get("last_modified"):
+                headers["If-Modified-Since"] = entrada["last_modified"]
+        return headers
+    
+    def guardar(self, produto, chave, texto, expira_em, etag=None, last_modified=None):
+        """Guarda (ou substitui) a entrada de (produto, chave)"""
+        self._entradas.put((produto, chave), {
+            "texto": texto,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expira_em": expira_em
+        })
+        with self._lock:
+            self.baixados += 1
+    
+    def guardar_validadores(self, produto, chave, etag=None, last_modified=None):
+        """Guarda apenas os validadores HTTP de uma consulta (ex.: um lote de estações)"""
+        self._entradas.put((produto, chave), {
+            "texto": None,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expira_em": 0
+        })
+    
+    def renovar(self, produto, chave, expira_em):
+        """Renova a validade de uma entrada após resposta 304"""
+        entrada = self.obter(produto, chave)
+        if entrada is None:
+            return None
+        with self._lock:
+            entrada["expira_em"] = expira_em
+            self.revalidados += 1
+        return entrada.get("texto")
+    
+    def estatisticas(self):
+        """Contadores de acertos, revalidações (304) e downloads"""
+        return {
+            "entradas": len(self._entradas),
+            "acertos": self.acertos,
+            "revalidados": self.revalidados,
+            "baixados": self.baixados
+        }
+    
+    def _carregar(self):
+        """Carrega entradas persistidas em disco"""
+        if not self.arquivo:
+            return
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, 'r') as f:
+                    for produto, chave, entrada in json.load(f):
+                        self._entradas.put((produto, chave), entrada)
+        except:
+            pass
+    
+    def salvar(self):
+        """Persiste as entradas em disco (escrita atômica)"""
+        if not self.arquivo:
+            return
+        with self._lock:
+            dados = [[produto, chave, dict(entrada)] for (produto, chave), entrada in self._entradas.items()]
+        
+        # Uma gravação por vez, cada uma no seu temporário (no mesmo diretório, para o replace)
+        with self._lock_arquivo:
+            temporario = None
+            try:
+                diretorio, nome = os.path.split(os.path.abspath(self.arquivo))
+                descritor, temporario = tempfile.mkstemp(prefix=nome + ".", suffix=".tmp", dir=diretorio)
+                with os.fdopen(descritor, 'w') as f:
+                    json.dump(dados, f)
+                os.replace(temporario, self.arquivo)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"⚠️ Erro ao salvar cache de produtos ({self.arquivo}): {e}")
+                if temporario is not None and os.path.exists(temporario):
+                    os.remove(temporario)
+
+class CacheQuadros:
+    """Último quadro processado de cada chave (ex.: região do satélite), identificado pelo conteúdo.
+    
+    Um quadro novo reaproveita o resultado guardado se o hash bruto for igual
+    ou, com `limiar_perceptual` definido, se os hashes perceptuais diferirem
+    em no máximo esse número de bits.
+    """
+    
+    def __init__(self, limiar_perceptual=None, maximo=64):
+        self.limiar_perceptual = limiar_perceptual
+        self._entradas = CacheLRU(maximo)
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.acertos_exatos = 0
+        self.acertos_perceptuais = 0
+    
+    def consultar(self, chave, hash_bruto, hash_perceptual=None):
+        """Retorna o resultado guardado se o quadro não mudou, senão None"""
+        entrada = self._entradas.get(chave)
+        with self._lock:
+            self.consultas += 1
+            if entrada is None:
+                return None
+            if entrada["hash"] == hash_bruto:
+                self.acertos_exatos += 1
+                return entrada["resultado"]
+            if (self.limiar_perceptual is not None and hash_perceptual is not None
+                    and entrada["perceptual"] is not None
+                    and bin(entrada["perceptual"] ^ hash_perceptual).count("1") <= self.limiar_perceptual):
+                self.acertos_perceptuais += 1
+                return entrada["resultado"]
+        return None
+    
+    def guardar(self, chave, hash_bruto, resultado, hash_perceptual=None):
+        """Guarda o resultado do quadro processado da chave"""
+        self._entradas.put(chave, {
+            "hash": hash_bruto,
+            "perceptual": hash_perceptual,
+            "resultado": resultado
+        })
+    
+    def invalidar(self, chave=None):
+        """Esquece o quadro da chave (ou de todas)"""
+        if chave is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(chave)
+    
+    def estatisticas(self):
+        """Consultas, acertos (exatos e perceptuais) e taxa de acerto"""
+        with self._lock:
+            acertos = self.acertos_exatos + self.acertos_perceptuais
+            return {
+                "entradas": len(self._entradas),
+                "consultas": self.consultas,
+                "acertos_exatos": self.acertos_exatos,
+                "acertos_perceptuais": self.acertos_perceptuais,
+                "taxa_acerto": acertos / self.consultas if self.consultas else 0.0,
+                "limiar_perceptual": self.limiar_perceptual
+            }
\ No newline at end of file
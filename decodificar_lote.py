@@ -0,0 +1,161 @@
+"""
+decodificar_lote.py - Decodificação offline de arquivos METAR/TAF em lote
+
+Lê um arquivo com um relatório por linha (ex.: dumps da NOAA), decodifica
+com MetarInterpreter/TAFInterpreter em um pool de processos e grava o
+resultado em JSON Lines ou CSV, na mesma ordem da entrada.
+
+Uso:
+    python decodificar_lote.py metars.txt -o metars.jsonl
+    python decodificar_lote.py tafs.txt -o tafs.csv --formato csv --tipo taf --processos 8
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from itertools import islice
+
+from metapi import MetarInterpreter, TAFInterpreter
+
+# Quebra um TAF de uma linha só nos grupos de mudança, como o interpretador espera
+_RE_GRUPO_MUDANCA_TAF = re.compile(r'\s+(?=(?:FM\d|BECMG|TEMPO|PROB\d))')
+
+# Interpretadores do processo atual (criados uma vez por worker); só a
+# interpretação é usada, então a sessão HTTP deles nunca chega a ser criada
+_metar_interpreter = None
+_taf_interpreter = None
+
+def _inicializar_worker():
+    """Cria os interpretadores uma vez por processo"""
+    global _metar_interpreter, _taf_interpreter
+    _metar_interpreter = MetarInterpreter()
+    _taf_interpreter = TAFInterpreter()
+
+def _detectar_tipo(texto, tipo):
+    """Define se a linha é METAR ou TAF (modo auto usa o prefixo)"""
+    if tipo != 'auto':
+        return tipo
+    return 'taf' if texto.startswith('TAF') else 'metar'
+
+def _decodificar_linha(item):
+    """Decodifica uma linha: (numero, texto, tipo) -> registro"""
+    numero, texto, tipo = item
+    tipo = _detectar_tipo(texto, tipo)
+    
+    if tipo == 'taf':
+        interpretacao = _taf_interpreter.interpretar_taf(_RE_GRUPO_MUDANCA_TAF.sub('\n', texto))
+    else:
+        interpretacao = _metar_interpreter.interpretar_metar(texto)
+    
+    return {
+        'linha': numero,
+        'tipo': tipo,
+        'aerodromo': interpretacao.get('aerodromo'),
+        'texto': texto,
+        'interpretacao': interpretacao
+    }
+
+def _ler_blocos(arquivo, tipo, tamanho_bloco):
+    """Lê o arquivo em blocos de linhas não vazias (streaming, memória constante)"""
+    linhas = ((numero, linha.strip(), tipo) for numero, linha in enumerate(arquivo, 1))
+    linhas = (item for item in linhas if item[1] and not item[1].startswith('#'))
+    while True:
+        bloco = list(islice(linhas, tamanho_bloco))
+        if not bloco:
+            return
+        yield bloco
+
+class _EscritorJSONL:
+    def __init__(self, saida):
+        self.saida = saida
+    
+    def escrever(self, registro):
+        self.saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+class _EscritorCSV:
+    colunas = ['linha', 'tipo', 'aerodromo', 'texto', 'interpretacao']
+    
+    def __init__(self, saida):
+        self.writer = csv.writer(saida)
+        self.writer.writerow(self.colunas)
+    
+    def escrever(self, registro):
+        registro = dict(registro, interpretacao=json.dumps(registro['interpretacao'], ensure_ascii=False))
+        self.writer.writerow([registro[coluna] for coluna in self.colunas])
+
+def decodificar_arquivo(arquivo, saida, formato='jsonl', tipo='auto', processos=None,
+                        tamanho_bloco=10000, chunksize=500, progresso=None):
+    """Decodifica todas as linhas de `arquivo` e grava em `saida`.
+    
+    Mantém um bloco em processamento no pool enquanto o anterior é gravado.
+    Retorna (quantidade de relatórios, segundos).
+    """
+    escritor = _EscritorCSV(saida) if formato == 'csv' else _EscritorJSONL(saida)
+    processos = processos or os.cpu_count() or 1
+    total = 0
+    inicio = time.perf_counter()
+    
+    def gravar(registros):
+        nonlocal total
+        for registro in registros:
+            escritor.escrever(registro)
+        total += len(registros)
+        if progresso:
+            progresso(total, time.perf_counter() - inicio)
+    
+    blocos = _ler_blocos(arquivo, tipo, tamanho_bloco)
+    
+    if processos == 1:
+        _inicializar_worker()
+        for bloco in blocos:
+            gravar([_decodificar_linha(item) for item in bloco])
+    else:
+        with multiprocessing.Pool(processos, initializer=_inicializar_worker) as pool:
+            pendente = None
+            for bloco in blocos:
+                proximo = pool.map_async(_decodificar_linha, bloco, chunksize)
+                if pendente is not None:
+                    gravar(pendente.get())
+                pendente = proximo
+            if pendente is not None:
+                gravar(pendente.get())
+    
+    return total, time.perf_counter() - inicio
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decodifica arquivos METAR/TAF (um relatório por linha)")
+    parser.add_argument('entrada', help="arquivo de entrada ('-' para stdin)")
+    parser.add_argument('-o', '--saida', default='-', help="arquivo de saída ('-' para stdout)")
+    parser.add_argument('--formato', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--tipo', choices=['auto', 'metar', 'taf'], default='auto')
+    parser.add_argument('--processos', type=int, default=None, help="padrão: número de CPUs")
+    parser.add_argument('--bloco', type=int, default=10000, help="linhas lidas por vez")
+    parser.add_argument('--chunksize', type=int, default=500, help="linhas por tarefa enviada ao pool")
+    args = parser.parse_args(argv)
+    
+    def progresso(total, segundos):
+        print(f"⏳ {total} relatórios ({total / max(segundos, 1e-9):.0f}/s)", file=sys.stderr)
+    
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, 'r', encoding='utf-8', errors='replace')
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8', newline='')
+    try:
+        total, segundos = decodificar_arquivo(
+            entrada, saida, args.formato, args.tipo, args.processos,
+            args.bloco, args.chunksize, progresso
+        )
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    
+    print(f"✅ {total} relatórios em {segundos:.1f}s ({total / max(segundos, 1e-9):.0f} relatórios/s)",
+          file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+http_utils.py - Sessão HTTP compartilhada (pool de conexões, keep-alive e retry)
+"""
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class SessaoHTTP:
+    """Sessão HTTP thread-safe com pool de conexões keep-alive, retry e limite por host"""
+    
+    def __init__(self, pool_conexoes=10, pool_maximo=20, tentativas=3, backoff=0.5,
+                 limite_por_host=4, timeout=10):
+        self.timeout = timeout
+        self.limite_por_host = limite_por_host
+        
+        # Um único adapter (e portanto um único pool urllib3) é compartilhado
+        # por todas as threads; cada thread tem sua própria requests.Session
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_conexoes,
+            pool_maxsize=pool_maximo,
+            max_retries=retry,
+            pool_block=True
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._semaforos_host = {}
+        self._requisicoes = 0
+    
+    def _sessao(self):
+        """Retorna a requests.Session da thread atual"""
+        sessao = getattr(self._local, 'sessao', None)
+        if sessao is None:
+            sessao = requests.Session()
+            sessao.mount('https://', self._adapter)
+            sessao.mount('http://', self._adapter)
+            self._local.sessao = sessao
+        return sessao
+    
+    def _semaforo(self, url):
+        """Retorna o semáforo que limita requisições simultâneas ao host"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaforo = self._semaforos_host.get(host)
+            if semaforo is None:
+                semaforo = threading.BoundedSemaphore(self.limite_por_host)
+                self._semaforos_host[host] = semaforo
+            return semaforo
+    
+    def get(self, url, timeout=None, **kwargs):
+        """GET usando o pool compartilhado"""
+        with self._semaforo(url):
+            with self._lock:
+                self._requisicoes += 1
+            return self._sessao().get(url, timeout=timeout or self.timeout, **kwargs)
+    
+    def estatisticas(self):
+        """Retorna contadores de requisições e de conexões abertas/reutilizadas"""
+        requisicoes_pool = 0
+        conexoes_abertas = 0
+        pools = self._adapter.poolmanager.pools
+        for chave in list(pools.keys()):
+            pool = pools.get(chave)
+            if pool is not None:
+                requisicoes_pool += pool.num_requests
+                conexoes_abertas += pool.num_connections
+        
+        return {
+            "requisicoes": self._requisicoes,
+            "conexoes_abertas": conexoes_abertas,
+            "conexoes_reutilizadas": max(requisicoes_pool - conexoes_abertas, 0)
+        }
+    
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        self._adapter.close()
+
+# Singleton global
+_sessao_http = None
+_sessao_lock = threading.Lock()
+
+def get_sessao_http():
+    """Retorna a instância única da SessaoHTTP"""
+    global _sessao_http
+    with _sessao_lock:
+        if _sessao_http is None:
+            _sessao_http = SessaoHTTP()
+    return _sessao_http
\ No newline at end of file
@@ -11,20 +11,25 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.clock import Clock, mainthread
 from kivy.core.window import Window
 from kivy.core.audio import SoundLoader
-import cv2
+import importlib.machinery
 import numpy as np
-import base64
 from datetime import datetime
-from satelite_utils import inicio, obter_imagem_com_selenium, detectar_cores, emitir_alerta
+from satelite_utils import inicio, obter_imagem
 from metapi import MetarInterpreter, TAFInterpreter, get_auto_update_manager
 import threading
 
+INTERVALO_LOOP = 0.5  # segundos entre quadros da animação do histórico
+
 class Interface(FloatLayout):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.metar_interpreter = MetarInterpreter()
         self.taf_interpreter = TAFInterpreter()
         self.sound_player = SoundPlayer()
+        self._textura_satelite = None  # Reaproveitada entre atualizações do mesmo tamanho
+        self._imagem_satelite_exibida = None  # Último array copiado para a textura
+        self._historico = None  # ArquivoQuadros da região em animação
+        self._evento_loop = None
         
         # Configura o auto-update manager
         self.auto_update_manager = get_auto_update_manager()
@@ -99,38 +104,30 @@ class Interface(FloatLayout):
         try:
             regiao = dados.get("regiao", "")
             hora = dados.get("hora", "")
-            imagem_base64 = dados.get("imagem", "")
+            imagem_bgr = dados.get("imagem_bgr")
             tempestades = dados.get("tempestades", False)
             chuva = dados.get("chuva", False)
+            sem_mudancas = dados.get("sem_mudancas", False)
             
-            # Atualiza imagem
-            if imagem_base64:
-                img_data = base64.b64decode(imagem_base64)
-                nparr = np.frombuffer(img_data, np.uint8)
-                img_cv = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                buffer = cv2.flip(img_cv, 0).tobytes()
-                texture = Texture.create(
-                    size=(img_cv.shape[1], img_cv.shape[0]), 
-                    colorfmt='bgr'
-                )
-                texture.blit_buffer(buffer, colorfmt='bgr', bufferfmt='ubyte')
-                
-                # Atualiza widget de imagem
-                self.ids.image_widget.texture = texture
-                self.ids.image_widget.canvas.ask_update()  # Força redraw
+            # Atualiza imagem (imagem sem mudanças já exibida não é copiada de novo)
+            if imagem_bgr is not None and imagem_bgr is not self._imagem_satelite_exibida:
+                self._mostrar_bgr(imagem_bgr)
             
             # Atualiza status com marcação de tempo
-            status = f"🛰️ {regiao} atualizado {hora}"
+            status = f"🛰️ {regiao} {'sem mudanças' if sem_mudancas else 'atualizado'} {hora}"
             if tempestades:
                 status += " ⚡"
-                self.sound_player.play("alert")
             if chuva:
                 status += " 🌧️"
-                self.sound_player.play("alert")
             
-            if not tempestades and not chuva:
-                self.sound_player.play("update")
+            # Alerta sonoro só para imagem nova
+            if not sem_mudancas:
+                if tempestades:
+                    self.sound_player.play("alert")
+                if chuva:
+                    self.sound_player.play("alert")
+                if not tempestades and not chuva:
+                    self.sound_player.play("update")
             
             # ATUALIZAÇÃO IMEDIATA DO LABEL
             self.ids.temp_label.text = status
@@ -184,18 +181,13 @@ class Interface(FloatLayout):
         try:
             Clock.schedule_once(lambda dt: setattr(self.ids.image_widget, 'color', (0, 0, 0, 1)))
             
-            texto_spinner = self.ids.spinner.text
-            if '-' in texto_spinner:
-                opcao = texto_spinner.split(' ')[0]
-                regiao_nome = texto_spinner.split(' - ')[1]
-            else:
-                opcao = "1"
-                regiao_nome = "América do Sul"
-            
+            opcao, regiao_nome = self._regiao_selecionada()
             regiao = inicio(opcao)
-            imagem = obter_imagem_com_selenium(regiao)
-            mascara_vermelho, mascara_amarelo = detectar_cores(imagem)
-            imagem_alerta = emitir_alerta(imagem, mascara_vermelho, mascara_amarelo)
+            imagem = obter_imagem(regiao)
+            # Detecção/anotação no pool de processos do manager (fora do processo do Kivy); avulsa:
+            # não entra no histórico, no cache de quadros nem no detector incremental da região
+            analise = self.auto_update_manager.analisar_imagem_satelite(opcao, imagem, avulsa=True).result()
+            imagem_alerta = analise["imagem_bgr"]
             
             Clock.schedule_once(lambda dt: self.exibir_imagem(imagem_alerta))
             
@@ -215,20 +207,90 @@ class Interface(FloatLayout):
         finally:
             Clock.schedule_once(lambda dt: self.set_loading(False))
     
+    def _regiao_selecionada(self):
+        """(código, nome) da região escolhida no spinner"""
+        texto_spinner = self.ids.spinner.text
+        if '-' in texto_spinner:
+            return texto_spinner.split(' ')[0], texto_spinner.split(' - ')[1]
+        return "1", "América do Sul"
+    
+    def alternar_loop(self, instance):
+        """Inicia/para a animação dos últimos quadros guardados da região"""
+        if self._evento_loop is not None:
+            self._evento_loop.cancel()
+            self._evento_loop = None
+            instance.text = '▶ Loop'
+            return
+        
+        opcao, regiao_nome = self._regiao_selecionada()
+        arquivo = self.auto_update_manager.arquivo_satelite(opcao)
+        quadros = len(arquivo) if arquivo is not None else 0
+        if not quadros:
+            self.ids.temp_label.text = f"⚠️ Nenhum quadro guardado de {regiao_nome}"
+            return
+        
+        self._historico = arquivo
+        slider = self.ids.slider_historico
+        slider.max = quadros - 1
+        slider.value = 0
+        self.mostrar_quadro_historico(0)
+        self._evento_loop = Clock.schedule_interval(self._proximo_quadro_loop, INTERVALO_LOOP)
+        instance.text = '⏸ Parar'
+    
+    def _proximo_quadro_loop(self, dt):
+        slider = self.ids.slider_historico
+        # O histórico continua recebendo quadros durante a animação: relê a quantidade a cada passo
+        slider.max = max(len(self._historico) - 1, 0)
+        # Mudar o valor do slider dispara mostrar_quadro_historico
+        slider.value = (int(slider.value) + 1) % (int(slider.max) + 1)
+    
+    def mostrar_quadro_historico(self, indice):
+        """Exibe o quadro `indice` (0 = mais antigo) do histórico carregado"""
+        if self._historico is None:
+            return
+        # Cópia tirada sob o lock do arquivo: um quadro novo pode sobrescrever a posição a qualquer momento
+        copia = self._historico.copiar(indice)
+        if copia is None:
+            return
+        
+        imagem_bgr, registro = copia
+        self._mostrar_bgr(imagem_bgr)
+        self.ids.image_widget.color = (1, 1, 1, 1)
+        horario = datetime.fromtimestamp(registro["instante"]).strftime('%d/%m %H:%M')
+        self.ids.temp_label.text = f"🕒 {horario} ({indice + 1}/{int(self.ids.slider_historico.max) + 1})"
+        self.ids.temp_label.opacity = 1
+    
     def exibir_imagem(self, imagem_alerta):
         """Exibe imagem processada"""
-        buffer = cv2.flip(imagem_alerta, 0).tobytes()
-        texture = Texture.create(size=(imagem_alerta.shape[1], imagem_alerta.shape[0]), colorfmt='bgr')
-        texture.blit_buffer(buffer, colorfmt='bgr', bufferfmt='ubyte')
-        self.ids.image_widget.texture = texture
+        self._mostrar_bgr(imagem_alerta)
         self.ids.image_widget.color = (1, 1, 1, 1)
+    
+    def _mostrar_bgr(self, imagem_bgr):
+        """Copia a imagem BGR direto para a textura (sem flip nem tobytes; o flip é feito nas UVs)"""
+        imagem_bgr = np.ascontiguousarray(imagem_bgr, dtype=np.uint8)
+        altura, largura = imagem_bgr.shape[:2]
+        
+        # Reaproveita a textura enquanto o tamanho não muda
+        texture = self._textura_satelite
+        if texture is None or texture.size != (largura, altura):
+            texture = Texture.create(size=(largura, altura), colorfmt='bgr')
+            texture.flip_vertical()
+            self._textura_satelite = texture
+        
+        texture.blit_buffer(imagem_bgr.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        self.ids.image_widget.texture = texture
+        self._imagem_satelite_exibida = imagem_bgr
         
         # Força redraw da imagem
         self.ids.image_widget.canvas.ask_update()
     
     def esconder_imagem(self, instance):
         """Esconde a imagem"""
+        if self._evento_loop is not None:
+            self.alternar_loop(self.ids.loop_btn)
+        self._historico = None
         self.ids.image_widget.texture = None 
+        self._imagem_satelite_exibida = None
         self.ids.image_widget.color = (0, 0, 0, 1)
         self.ids.spinner.text = 'Escolha a região' 
         self.ids.spinner.disabled = False
@@ -477,4 +539,7 @@ class SateliteApp(App):
         return Interface()
 
 if __name__ == '__main__':
+    # Os processos "spawn" da análise de satélite não reexecutam este script (abririam outra
+    # janela): um __main__ com spec "__main__" é tratado como código só do processo principal
+    __spec__ = importlib.machinery.ModuleSpec("__main__", None)
     SateliteApp().run()
\ No newline at end of file
@@ -1,19 +1,402 @@
-import requests
 from metar_taf_parser.parser import parser
 from metar_taf_parser.model.enum import *
 import re
 from datetime import datetime
 import json
+import logging
 import threading
 import time
 import queue
-from datetime import datetime, timedelta
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
 import os
-import base64
-import cv2
+import atexit
+import numpy as np
+from http_utils import get_sessao_http
+from persistencia import criar_persistencia
+from agendador import Agendador
+from arquivo_satelite import ArquivoQuadros
+from cache_utils import CacheLRU, CacheProdutos, CacheQuadros
+from tarefas_utils import ExecutorTarefas
+from resultados import (TIPOS_PREVISAO, CamadaNuvem, MetarDecodificado, PrevisaoTAF,
+                        TAFDecodificado, Vento, formatar_periodo)
+
+# Erros do interpretador de TAF (seguem a configuração de logging da aplicação)
+_logger_taf = logging.getLogger("metapi.taf")
+
+# Trace do interpretador (desligado por padrão; ver TAFInterpreter.set_trace). Logger
+# filho dedicado, com handler e nível próprios e sem propagar: ligar o trace não
+# mexe em "metapi.taf" nem nos loggers da aplicação
+_logger_trace_taf = _logger_taf.getChild("trace")
+_logger_trace_taf.propagate = False
+
+def _configurar_logger_trace():
+    """Garante que o trace apareça mesmo sem configuração de logging na aplicação"""
+    if not _logger_trace_taf.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger_trace_taf.addHandler(handler)
+        _logger_trace_taf.setLevel(logging.DEBUG)
+
+URL_METAR = "https://aviationweather.gov/api/data/metar"
+URL_TAF = "https://aviationweather.gov/api/data/taf"
+MAX_IDS_POR_REQUISICAO = 400  # Limite de estações por URL (ids=A,B,C...)
+
+# Validade usada pelo cache de produtos
+VALIDADE_METAR = timedelta(minutes=30)       # METAR novo a cada ~30 min
+INTERVALO_EMISSAO_TAF = timedelta(hours=6)   # TAF reemitido a cada ~6 h
+TTL_MINIMO_METAR = timedelta(minutes=2)
+TTL_MINIMO_TAF = timedelta(minutes=5)
+ATRASO_NOVA_TENTATIVA = 60  # segundos até repetir uma atualização automática que falhou
+MAX_SATELITE_SIMULTANEOS = 2  # Cada captura abre um Chrome
+MAX_METAR_SIMULTANEOS = 2
+PROCESSOS_SATELITE = min(2, (os.cpu_count() or 1) - 1)  # Análise de satélite fora do processo da UI (0: threads)
+QUADROS_ARQUIVO_SATELITE = 12  # Últimos quadros guardados por região para a animação (0: sem histórico)
+DIRETORIO_ARQUIVO_SATELITE = "metapi_satelite"
+
+# Classificação dos tokens do METAR: cada token cai em no máximo um grupo
+_RE_TOKEN_METAR = re.compile(
+    r'(?P<data_hora>\d{6}Z)'
+    r'|(?P<qnh>Q\d{4})'
+    r'|(?P<visibilidade>\d{4})'
+    r'|(?P<temperatura>(?=[\d/]*/)(?=[\d/]*\d)[\d/]{5})'
+    r'|(?P<nuvens>(?:FEW|SCT|BKN|OVC|VV).*)'
+    r'|(?P<vento>.*(?:KT|MPS|KMH).*)'
+)
+_RE_UNIDADE_VENTO = re.compile(r'KT|MPS|KMH')
+_RE_VENTO_METAR = re.compile(r'(\d{3})(\d{2,3})(G(\d{2,3}))?')
+_TABELA_TOKENS_METAR = {}  # token -> (grupo, é nuvem, vento em nós)
+_MAX_TABELA_TOKENS = 50000
+
+_RE_VENTO_VRB = re.compile(r'VRB(\d{2,3})(?:G(\d{2,3}))?')
+_RE_CAMADA_NUVEM = re.compile(r'(FEW|SCT|BKN|OVC|VV)(\d{3})?(.*)')
+
+def _vento_metar(token):
+    """Vento numérico a partir do token de vento do METAR"""
+    unidade = next((u for u in ('KT', 'MPS', 'KMH') if u in token), 'KT')
+    if 'VRB' in token:
+        match = _RE_VENTO_VRB.search(token)
+        velocidade, rajada = match.groups() if match else (None, None)
+        return Vento(None, int(velocidade) if velocidade else None,
+                     int(rajada) if rajada else None, variavel=True, unidade=unidade)
+    
+    match = _RE_VENTO_METAR.search(token)
+    if match is None:
+        return Vento(None, None, unidade=unidade)
+    direcao, velocidade, _, rajada = match.groups()
+    return _vento_numerico(direcao, velocidade, rajada, unidade=unidade)
+
+def _vento_numerico(direcao, velocidade, rajada, variavel=False, unidade='KT'):
+    """Vento a partir dos textos do relatório, guardando a quantidade de dígitos"""
+    return Vento(None if variavel else int(direcao), int(velocidade), int(rajada) if rajada else None,
+                 variavel=variavel, unidade=unidade, digitos_velocidade=len(velocidade),
+                 digitos_rajada=len(rajada) if rajada else 2)
+
+def _camada_nuvem_metar(token):
+    """Camada de nuvens (cobertura, altura em pés, resto do token) a partir do token do METAR"""
+    match = _RE_CAMADA_NUVEM.match(token)
+    cobertura, altura, tipo = match.groups()
+    return CamadaNuvem(cobertura, int(altura) * 100 if altura else None, tipo or None)
+
+def _classificar_token_metar(parte):
+    """Classifica um token do METAR: (grupo, é nuvem, contém KT)"""
+    match = _RE_TOKEN_METAR.fullmatch(parte)
+    grupo = match.lastgroup if match else None
+    nuvem = grupo == 'nuvens'
+    if nuvem:
+        # Grupo de nuvens que contém unidade de vento também conta como vento
+        grupo = 'vento' if _RE_UNIDADE_VENTO.search(parte) else None
+    return grupo, nuvem, 'KT' in parte
+
+def _compilar_condicoes(descricoes):
+    """Compila os códigos de tempo em uma alternância única (mais longos primeiro).
+    
+    Equivale a buscar r'\bCODIGO\b' para cada código: o grupo 1 captura a
+    intensidade (+/-) quando ela vem colada a um caractere de palavra, como
+    exige o \b antes do sinal, e o grupo 2 captura o código sem sinal.
+    """
+    radicais = sorted({codigo.lstrip('+-') for codigo in descricoes}, key=len, reverse=True)
+    return re.compile(r'(?:(?<=\w)([+-]))?\b(' + '|'.join(map(re.escape, radicais)) + r')\b')
+
+# Padrões do TAF compilados uma única vez e compartilhados por todos os extratores
+_PADROES_TAF = {
+    'aerodromo': re.compile(r'[A-Z]{4}'),
+    'emissao': re.compile(r'\b(\d{2})(\d{2})(\d{2})Z\b'),
+    'periodo': re.compile(r'(\d{4})/(\d{4})'),
+    'fm': re.compile(r'FM(\d{4})'),
+    'vento': re.compile(r'(\d{3}|VRB)(\d{2,3})(G(\d{2,3}))?KT'),
+    'quatro_digitos': re.compile(r'\d{4}'),
+    'limpeza_visibilidade': (
+        re.compile(r'\d{5}KT'),     # Vento
+        re.compile(r'VRB\d{2}KT'),  # Vento variável
+        re.compile(r'\d{6}Z'),      # Data/hora
+        re.compile(r'\d{4}/\d{4}')  # Validade
+    ),
+    'visibilidade_m': re.compile(r'\b(\d{4})\b'),
+    'visibilidade_sm': re.compile(r'(\d+)(?:\.(\d+))?SM'),
+    'nuvens': re.compile(r'(FEW|SCT|BKN|OVC|VV)(\d{3})'),
+}
+_TABELA_TOKENS_TAF = {}  # token -> análise (_analisar_token_taf)
+
+def _analisar_token_taf(token):
+    """Extrai de um token tudo o que os extratores do TAF usam.
+    
+    Retorna (aerodromo, fm, periodo, vento, visibilidade_m, visibilidade_sm, nuvens).
+    Nenhum padrão cruza espaços, então procurar token a token equivale a
+    procurar no bloco inteiro.
+    """
+    padroes = _PADROES_TAF
+    
+    aerodromo = len(token) == 4 and padroes['aerodromo'].fullmatch(token) is not None
+    
+    match = padroes['fm'].search(token) if 'FM' in token else None
+    fm = match.group(1) if match else None
+    
+    match = padroes['periodo'].search(token) if '/' in token else None
+    periodo = match.groups() if match else None
+    
+    match = padroes['vento'].search(token) if 'KT' in token else None
+    vento = match.groups() if match else None
+    
+    visibilidade_m = None
+    if padroes['quatro_digitos'].search(token):
+        limpo = token
+        for padrao in padroes['limpeza_visibilidade']:
+            limpo = padrao.sub('', limpo)
+        match = padroes['visibilidade_m'].search(limpo)
+        visibilidade_m = match.group(1) if match else None
+    
+    match = padroes['visibilidade_sm'].search(token) if 'SM' in token else None
+    visibilidade_sm = match.groups() if match else None
+    
+    nuvens = tuple(padroes['nuvens'].findall(token))
+    
+    return aerodromo, fm, periodo, vento, visibilidade_m, visibilidade_sm, nuvens
+
+class GrupoTAF:
+    """Um bloco do TAF tokenizado uma única vez; cada campo guarda a primeira ocorrência"""
+    __slots__ = ('texto', 'cavok', 'aerodromo', 'fm', 'periodo', 'vento',
+                 'visibilidade_m', 'visibilidade_sm', 'nuvens')
+    
+    def __init__(self, texto):
+        self.texto = texto
+        self.cavok = 'CAVOK' in texto
+        self.aerodromo = self.fm = self.periodo = self.vento = None
+        self.visibilidade_m = self.visibilidade_sm = None
+        self.nuvens = []
+        
+        tabela = _TABELA_TOKENS_TAF
+        for token in texto.split():
+            analise = tabela.get(token)
+            if analise is None:
+                analise = _analisar_token_taf(token)
+                if len(tabela) >= _MAX_TABELA_TOKENS:
+                    tabela.clear()
+                tabela[token] = analise
+            
+            aerodromo, fm, periodo, vento, visibilidade_m, visibilidade_sm, nuvens = analise
+            if aerodromo and self.aerodromo is None:
+                self.aerodromo = token
+            if fm and self.fm is None:
+                self.fm = fm
+            if periodo and self.periodo is None:
+                self.periodo = periodo
+            if vento and self.vento is None:
+                self.vento = vento
+            if visibilidade_m and self.visibilidade_m is None:
+                self.visibilidade_m = visibilidade_m
+            if visibilidade_sm and self.visibilidade_sm is None:
+                self.visibilidade_sm = visibilidade_sm
+            if nuvens:
+                self.nuvens.extend(nuvens)
+
+def _dia_hora(ddhh):
+    """'DDHH' -> (dia, hora)"""
+    return int(ddhh[:2]), int(ddhh[2:])
+
+def _periodo_grupo(grupo):
+    """Período DDHH/DDHH do grupo como ((dia, hora), (dia, hora)), ou None"""
+    if grupo.periodo:
+        return _dia_hora(grupo.periodo[0]), _dia_hora(grupo.periodo[1])
+    return None
+
+def _grupo_taf(texto):
+    """Aceita texto ou GrupoTAF já tokenizado"""
+    return texto if isinstance(texto, GrupoTAF) else GrupoTAF(texto)
+
+def _normalizar_icaos(icao_codes):
+    """Normaliza lista de códigos ICAO removendo vazios e duplicatas"""
+    icaos = []
+    vistos = set()
+    for icao in icao_codes:
+        icao = icao.upper().strip()
+        if icao and icao not in vistos:
+            vistos.add(icao)
+            icaos.append(icao)
+    return icaos
+
+def _separar_por_estacao(texto, icaos):
+    """Separa a resposta de uma consulta em lote em um relatório por estação"""
+    prefixos = ('METAR', 'SPECI', 'TAF')
+    icaos = set(icaos)
+    relatorios = []
+    linhas_atuais = []
+    
+    for linha in texto.split('\n'):
+        if not linha.strip():
+            continue
+        
+        # Um novo relatório começa com METAR/SPECI/TAF ou com o próprio ICAO
+        primeiro = linha.split()[0]
+        if primeiro in prefixos or (primeiro in icaos and not linha[:1].isspace()):
+            if linhas_atuais:
+                relatorios.append(linhas_atuais)
+            linhas_atuais = [linha]
+        elif linhas_atuais:
+            linhas_atuais.append(linha)
+    
+    if linhas_atuais:
+        relatorios.append(linhas_atuais)
+    
+    # Associa cada relatório à sua estação (mantém o primeiro = mais recente)
+    por_estacao = {}
+    for linhas in relatorios:
+        for token in linhas[0].split()[:3]:
+            if token in icaos:
+                if token not in por_estacao:
+                    por_estacao[token] = '\n'.join(linhas).strip()
+                break
+    
+    return por_estacao
+
+def _datahora_utc(dia, hora, minuto, referencia):
+    """Converte dia/hora/minuto de um relatório no datetime UTC mais próximo da referência"""
+    candidatos = []
+    for delta_mes in (-1, 0, 1):
+        ano, mes = divmod(referencia.year * 12 + referencia.month - 1 + delta_mes, 12)
+        try:
+            inicio_dia = datetime(ano, mes + 1, dia, tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        candidatos.append(inicio_dia + timedelta(hours=hora, minutes=minuto))
+    
+    return min(candidatos, key=lambda d: abs(d - referencia)) if candidatos else None
+
+def _extrair_emissao(texto, referencia):
+    """Extrai o horário de emissão/observação (DDHHMMZ) como datetime UTC"""
+    match = _PADROES_TAF['emissao'].search(texto)
+    if match:
+        return _datahora_utc(*map(int, match.groups()), referencia)
+    return None
+
+def _periodo_validade(texto, referencia):
+    """Extrai o período DDHH/DDHH do TAF (mesmo formato de _extrair_validade) como datetimes UTC"""
+    match = _PADROES_TAF['periodo'].search(texto)
+    if match:
+        inicio, fim = match.groups()
+        dia_inicio, hora_inicio, dia_fim, hora_fim = int(inicio[:2]), int(inicio[2:]), int(fim[:2]), int(fim[2:])
+        inicio = _datahora_utc(dia_inicio, hora_inicio, 0, referencia)
+        fim = _datahora_utc(dia_fim, hora_fim, 0, referencia)
+        if inicio and fim:
+            return inicio, fim
+    return None
+
+def _calcular_expiracao(produto, texto, agora=None):
+    """Calcula até quando (epoch) um relatório em cache é considerado atual.
+    
+    METAR: observação + 30 min. TAF: o que vier antes entre a próxima emissão
+    (emissão + 6 h) e o fim da validade. Sempre respeita um TTL mínimo para
+    que relatórios atrasados sejam revalidados sem martelar o servidor.
+    """
+    agora = agora or datetime.now(timezone.utc)
+    emissao = _extrair_emissao(texto, agora)
+    
+    if produto == 'taf':
+        candidatos = []
+        if emissao:
+            candidatos.append(emissao + INTERVALO_EMISSAO_TAF)
+        validade = _periodo_validade(texto, agora)
+        if validade:
+            candidatos.append(validade[1])
+        expira = min(candidatos) if candidatos else agora
+        minimo = TTL_MINIMO_TAF
+    else:
+        expira = emissao + VALIDADE_METAR if emissao else agora
+        minimo = TTL_MINIMO_METAR
+    
+    return max(expira, agora + minimo).timestamp()
+
+def _obter_lote(sessao, url_base, icaos, produto=None, cache=None):
+    """Baixa um produto para várias estações, uma requisição a cada MAX_IDS_POR_REQUISICAO.
+    
+    Com cache, estações ainda dentro da validade não são consultadas e as
+    demais usam GET condicional (ETag/Last-Modified).
+    """
+    textos, icaos = _separar_atuais_em_cache(icaos, produto, cache)
+    
+    for lote in _dividir_lotes(icaos):
+        url = f"{url_base}?ids={','.join(lote)}"
+        response = sessao.get(url, headers=_cabecalhos_condicionais(cache, produto, lote))
+        _registrar_resposta_lote(textos, cache, produto, lote,
+                                 response.status_code, response.text, response.headers)
+    
+    return textos
+
+def _separar_atuais_em_cache(icaos, produto, cache):
+    """Retorna (textos ainda válidos no cache, estações que precisam ser consultadas)"""
+    if cache is None:
+        return {}, list(icaos)
+    
+    agora = time.time()
+    textos = {}
+    pendentes = []
+    for icao in icaos:
+        texto = cache.obter_atual(produto, icao, agora)
+        if texto:
+            textos[icao] = texto
+        else:
+            pendentes.append(icao)
+    return textos, pendentes
+
+def _dividir_lotes(icaos, tamanho=MAX_IDS_POR_REQUISICAO):
+    """Divide a lista de estações em lotes de no máximo `tamanho`"""
+    return [icaos[i:i + tamanho] for i in range(0, len(icaos), tamanho)]
+
+def _cabecalhos_condicionais(cache, produto, lote):
+    """Cabeçalhos de GET condicional, só quando todas as estações do lote estão em cache"""
+    if cache is not None and all((cache.obter(produto, icao) or {}).get("texto") for icao in lote):
+        return cache.validadores(produto, ','.join(lote))
+    return {}
+
+def _registrar_resposta_lote(textos, cache, produto, lote, status, corpo, headers):
+    """Acrescenta a `textos` os relatórios de uma resposta (200 ou 304) e atualiza o cache"""
+    if status == 304 and cache is not None:
+        for icao in lote:
+            texto = (cache.obter(produto, icao) or {}).get("texto")
+            if texto:
+                textos[icao] = cache.renovar(produto, icao, _calcular_expiracao(produto, texto))
+    
+    elif status == 200 and corpo.strip():
+        separados = _separar_por_estacao(corpo, lote)
+        textos.update(separados)
+        
+        if cache is not None:
+            etag = headers.get("ETag")
+            last_modified = headers.get("Last-Modified")
+            for icao, texto in separados.items():
+                if len(lote) == 1:
+                    cache.guardar(produto, icao, texto, _calcular_expiracao(produto, texto), etag, last_modified)
+                else:
+                    cache.guardar(produto, icao, texto, _calcular_expiracao(produto, texto))
+            if len(lote) > 1:
+                cache.guardar_validadores(produto, ','.join(lote), etag, last_modified)
 
 class MetarInterpreter:
-    def __init__(self):
+    def __init__(self, sessao=None, cache=None, max_interpretacoes=512):
+        self._sessao = sessao
+        self.cache = cache
+        # Memoização: texto bruto do METAR -> interpretação (resultado compartilhado, não modificar)
+        self._interpretacoes = CacheLRU(max_interpretacoes)
         self.weather_descriptions = {
             'RA': 'Chuva 🌧️', 
             '-RA': 'Chuva leve 🌧️','+RA': 'Chuva forte 🌧️',
@@ -30,14 +413,21 @@ class MetarInterpreter:
             'VCSH': 'Pancada na vizinhança', 'SHRA': 'Pancada de chuva 🌧️', '+SHRA': 'Pancada de chuva forte 🌧️','-SHRA': 'Pancada de chuva leve 🌧️',
         }
     
+    @property
+    def sessao(self):
+        """Sessão HTTP, criada só na primeira consulta (interpretar não usa a rede)"""
+        if self._sessao is None:
+            self._sessao = get_sessao_http()
+        return self._sessao
+    
     def obter_metar_taf(self, icao_code):
         """Obtém METAR e TAF para um aeródromo"""
         try:
             icao = icao_code.upper().strip()
             
             # Obtém METAR
-            url_metar = f"https://aviationweather.gov/api/data/metar?ids={icao}"
-            response_metar = requests.get(url_metar, timeout=10)
+            url_metar = f"{URL_METAR}?ids={icao}"
+            response_metar = self.sessao.get(url_metar)
             
             metar_text = response_metar.text.strip() if response_metar.status_code == 200 and response_metar.text.strip() != '' else None
             
@@ -53,7 +443,45 @@ class MetarInterpreter:
         except Exception as e:
             return {'sucesso': False, 'erro': str(e)}
     
+    def obter_metar_lote(self, icao_codes):
+        """Obtém METAR de vários aeródromos em uma única requisição.
+        
+        Retorna um dicionário {icao: resultado} no mesmo formato de obter_metar_taf.
+        """
+        icaos = _normalizar_icaos(icao_codes)
+        try:
+            textos = _obter_lote(self.sessao, URL_METAR, icaos, "metar", self.cache)
+        except Exception as e:
+            return {icao: {'sucesso': False, 'erro': str(e)} for icao in icaos}
+        
+        return self.montar_resultados_lote(icaos, textos)
+    
+    def montar_resultados_lote(self, icaos, textos, erros=None):
+        """Monta {icao: resultado} a partir dos textos baixados (erros: icao -> mensagem)"""
+        erros = erros or {}
+        resultados = {}
+        for icao in icaos:
+            metar_text = textos.get(icao)
+            if metar_text:
+                resultados[icao] = {
+                    'sucesso': True,
+                    'metar': metar_text,
+                    'interpretacao_metar': self.interpretar_metar(metar_text)
+                }
+            else:
+                resultados[icao] = {'sucesso': False, 'erro': erros.get(icao, 'Dados não disponíveis')}
+        
+        return resultados
+    
     def interpretar_metar(self, metar_text):
+        """Interpreta METAR, reaproveitando o resultado se o texto bruto já foi visto"""
+        interpretacao = self._interpretacoes.get(metar_text)
+        if interpretacao is None:
+            interpretacao = self._interpretar_metar(metar_text)
+            self._interpretacoes.put(metar_text, interpretacao)
+        return interpretacao
+    
+    def _interpretar_metar(self, metar_text):
         """Interpreta METAR com foco em simplicidade"""
         try:
             # Verificação direta por CAVOK
@@ -65,6 +493,43 @@ class MetarInterpreter:
         except Exception as e:
             return {'erro': f'Erro na interpretação: {str(e)}', 'raw': metar_text}
     
+    def _classificar_tokens(self, partes, cavok=False):
+        """Classifica os tokens do METAR em uma única passada.
+        
+        Retorna (campos, condicoes, nuvens): campos guarda o primeiro token de
+        cada grupo (data_hora, vento, visibilidade, temperatura, qnh);
+        condicoes e nuvens são os tokens encontrados, na ordem do texto.
+        """
+        campos = {}
+        condicoes = []
+        nuvens = []
+        descricoes = self.weather_descriptions
+        tabela = _TABELA_TOKENS_METAR
+        
+        for parte in partes:
+            if parte in descricoes:
+                condicoes.append(parte)
+                continue
+            
+            # Tokens se repetem muito (9999, Q1015, CAVOK...): a classe fica em tabela
+            classe = tabela.get(parte)
+            if classe is None:
+                classe = _classificar_token_metar(parte)
+                if len(tabela) >= _MAX_TABELA_TOKENS:
+                    tabela.clear()
+                tabela[parte] = classe
+            
+            grupo, nuvem, em_nos = classe
+            if nuvem:
+                nuvens.append(parte)
+            
+            # Com CAVOK só ventos em nós são considerados
+            if grupo is None or grupo in campos or (cavok and grupo == 'vento' and not em_nos):
+                continue
+            campos[grupo] = parte
+        
+        return campos, condicoes, nuvens
+    
     def _interpretar_cavok(self, metar_text):
         """Interpretação para METAR com CAVOK"""
         info = {'cavok': True, 'condicoes': 'CAVOK - Ceiling and Visibility OK ✅'}
@@ -74,31 +539,25 @@ class MetarInterpreter:
         if len(partes) > 0:
             info['aerodromo'] = partes[1]
         
+        campos, _, _ = self._classificar_tokens(partes, cavok=True)
+        
         # Data/hora
-        for parte in partes:
-            if 'Z' in parte and len(parte) == 7 and parte[:-1].isdigit():
-                info['data_hora'] = parte
-                break
+        if 'data_hora' in campos:
+            info['data_hora'] = campos['data_hora']
         
-        # Vento (usando abordagem mais simples)
-        for parte in partes:
-            if 'KT' in parte:
-                info['vento'] = self._extrair_vento_simples(parte)
-                break
+        # Vento
+        if 'vento' in campos:
+            info['vento'] = self._extrair_vento_simples(campos['vento'])
         
         # Temperatura
-        for parte in partes:
-            if '/' in parte and len(parte) == 5 and parte.replace('/', '').isdigit():
-                temp, orvalho = parte.split('/')
-                info['temperatura'] = f"{temp}°C"
-                info['orvalho'] = f"{orvalho}°C"
-                break
+        if 'temperatura' in campos:
+            temp, orvalho = campos['temperatura'].split('/')
+            info['temperatura'] = f"{temp}°C"
+            info['orvalho'] = f"{orvalho}°C"
         
         # QNH
-        for parte in partes:
-            if parte.startswith('Q') and parte[1:].isdigit() and len(parte) == 5:
-                info['qnh'] = f"{parte[1:]} hPa"
-                break
+        if 'qnh' in campos:
+            info['qnh'] = f"{campos['qnh'][1:]} hPa"
         
         info.update({
             'visibilidade': '10km+ 🌤️',
@@ -117,63 +576,87 @@ class MetarInterpreter:
         else:
             info['aerodromo'] = "N/A"
         
+        campos, condicoes, nuvens = self._classificar_tokens(partes)
+        
         # Data/hora
-        for parte in partes:
-            if 'Z' in parte and len(parte) == 7 and parte[:-1].isdigit():
-                info['data_hora'] = parte
-                break
+        if 'data_hora' in campos:
+            info['data_hora'] = campos['data_hora']
         
-        # Vento (abordagem mais tolerante)
-        for parte in partes:
-            if 'KT' in parte or 'MPS' in parte or 'KMH' in parte:
-                info['vento'] = self._extrair_vento_simples(parte)
-                break
+        # Vento
+        if 'vento' in campos:
+            info['vento'] = self._extrair_vento_simples(campos['vento'])
         
         # Visibilidade (4 dígitos)
-        for parte in partes:
-            if len(parte) == 4 and parte.isdigit():
-                info['visibilidade'] = f"{parte} metros"
-                break
+        if 'visibilidade' in campos:
+            info['visibilidade'] = f"{campos['visibilidade']} metros"
         
         # Temperatura
-        for parte in partes:
-            if '/' in parte and len(parte) == 5 and parte.replace('/', '').isdigit():
-                temp, orvalho = parte.split('/')
-                info['temperatura'] = f"{temp}°C"
-                info['orvalho'] = f"{orvalho}°C"
-                break
+        if 'temperatura' in campos:
+            temp, orvalho = campos['temperatura'].split('/')
+            info['temperatura'] = f"{temp}°C"
+            info['orvalho'] = f"{orvalho}°C"
         
         # QNH
-        for parte in partes:
-            if parte.startswith('Q') and parte[1:].isdigit() and len(parte) == 5:
-                info['qnh'] = f"{parte[1:]} hPa"
-                break
-        
-        # Condições meteorológicas (busca por códigos simples)
-        condicoes = []
-        for parte in partes:
-            if parte in self.weather_descriptions:
-                condicoes.append(self.weather_descriptions[parte])
+        if 'qnh' in campos:
+            info['qnh'] = f"{campos['qnh'][1:]} hPa"
         
+        # Condições meteorológicas (códigos simples)
+        condicoes = [self.weather_descriptions[codigo] for codigo in condicoes]
         info['condicoes'] = ", ".join(condicoes) if condicoes else "Sem tempo presente significativo"
         
-        # Nuvens (busca por prefixos comuns)
-        nuvens = []
-        for parte in partes:
-            if parte.startswith(('FEW', 'SCT', 'BKN', 'OVC', 'VV')):
-                nuvens.append(parte)
-        
+        # Nuvens (prefixos comuns)
         info['nuvens'] = ", ".join(nuvens) if nuvens else "Sem nuvens significativas"
         
         return info
     
+    def decodificar_metar(self, metar_text):
+        """Decodifica METAR em um MetarDecodificado (valores numéricos).
+        
+        Os textos no formato de interpretar_metar saem de .como_dict().
+        Retorna None se o METAR não puder ser decodificado.
+        """
+        try:
+            partes = metar_text.split()
+            cavok = 'CAVOK' in metar_text
+            campos, condicoes, nuvens = self._classificar_tokens(partes, cavok=cavok)
+            
+            metar = MetarDecodificado(
+                aerodromo=partes[1] if len(partes) > 1 else "N/A",
+                data_hora=campos.get('data_hora'),
+                cavok=cavok,
+                descricoes=self.weather_descriptions
+            )
+            
+            if 'vento' in campos:
+                metar.vento = _vento_metar(campos['vento'])
+            if 'temperatura' in campos:
+                # Grupo com mais de uma barra (ex.: 25///) é erro para interpretar_metar
+                if campos['temperatura'].count('/') != 1:
+                    return None
+                temperatura, _, orvalho = campos['temperatura'].partition('/')
+                if temperatura.isdigit() and orvalho.isdigit():
+                    metar.temperatura, metar.orvalho = int(temperatura), int(orvalho)
+            if 'qnh' in campos:
+                metar.qnh = int(campos['qnh'][1:])
+            
+            if not cavok:
+                if 'visibilidade' in campos:
+                    metar.visibilidade_m = int(campos['visibilidade'])
+                metar.condicoes = tuple(condicoes)
+                metar.nuvens = tuple(_camada_nuvem_metar(parte) for parte in nuvens)
+            
+            return metar
+        
+        except Exception:
+            return None
+    
     def _extrair_vento_simples(self, vento_str):
         """Extrai informações de vento de forma simples"""
         if 'VRB' in vento_str:
             return "Vento variável"
         
         # Extrai direção e velocidade
-        match = re.search(r'(\d{3})(\d{2,3})(G(\d{2,3}))?', vento_str)
+        match = _RE_VENTO_METAR.search(vento_str)
         if match:
             direcao, velocidade, _, rajada = match.groups()
             if rajada:
@@ -184,7 +667,13 @@ class MetarInterpreter:
         return "Informações de vento não disponíveis"
 
 class TAFInterpreter:
-    def __init__(self):
+    def __init__(self, sessao=None, cache=None, max_interpretacoes=512, trace=False):
+        self._sessao = sessao
+        self.cache = cache
+        self.trace = False
+        self.set_trace(trace)
+        # Memoização: texto bruto do TAF -> interpretação (resultado compartilhado, não modificar)
+        self._interpretacoes = CacheLRU(max_interpretacoes)
         self.weather_descriptions = {
             # COMPOSTAS (mais específicas)
             'TSRA': 'Trovoada com chuva ⛈️',
@@ -236,6 +725,10 @@ class TAFInterpreter:
             'TS': 'Trovoada ⚡',
         }
         
+        # Todos os códigos de tempo em uma única regex, compilada uma vez
+        self._re_condicoes = _compilar_condicoes(self.weather_descriptions)
+        self._ordem_condicoes = {codigo: i for i, codigo in enumerate(self.weather_descriptions)}
+        
         self.cloud_descriptions = {
             'FEW': 'Poucas nuvens (1-2 oitavos)',
             'SCT': 'Nuvens dispersas (3-4 oitavos)',
@@ -244,12 +737,19 @@ class TAFInterpreter:
             'VV': 'Teto vertical invisível'
         }
     
+    @property
+    def sessao(self):
+        """Sessão HTTP, criada só na primeira consulta (interpretar não usa a rede)"""
+        if self._sessao is None:
+            self._sessao = get_sessao_http()
+        return self._sessao
+    
     def obter_taf(self, icao_code):
         """Obtém TAF para um aeródromo"""
         try:
             icao = icao_code.upper().strip()
-            url = f"https://aviationweather.gov/api/data/taf?ids={icao}"
-            response = requests.get(url, timeout=10)
+            url = f"{URL_TAF}?ids={icao}"
+            response = self.sessao.get(url)
             
             if response.status_code == 200 and response.text.strip():
                 taf_text = response.text.strip()
@@ -264,11 +764,63 @@ class TAFInterpreter:
         except Exception as e:
             return {'sucesso': False, 'erro': str(e)}
     
+    def obter_taf_lote(self, icao_codes):
+        """Obtém TAF de vários aeródromos em uma única requisição.
+        
+        Retorna um dicionário {icao: resultado} no mesmo formato de obter_taf.
+        """
+        icaos = _normalizar_icaos(icao_codes)
+        try:
+            textos = _obter_lote(self.sessao, URL_TAF, icaos, "taf", self.cache)
+        except Exception as e:
+            return {icao: {'sucesso': False, 'erro': str(e)} for icao in icaos}
+        
+        return self.montar_resultados_lote(icaos, textos)
+    
+    def montar_resultados_lote(self, icaos, textos, erros=None):
+        """Monta {icao: resultado} a partir dos textos baixados (erros: icao -> mensagem)"""
+        erros = erros or {}
+        resultados = {}
+        for icao in icaos:
+            taf_text = textos.get(icao)
+            if taf_text:
+                resultados[icao] = {
+                    'sucesso': True,
+                    'taf': taf_text,
+                    'interpretacao': self.interpretar_taf(taf_text)
+                }
+            else:
+                resultados[icao] = {'sucesso': False, 'erro': erros.get(icao, 'TAF não disponível')}
+        
+        return resultados
+    
+    def set_trace(self, ativo=True):
+        """Liga/desliga o trace desta instância (mensagens vão para o logger 'metapi.taf.trace')"""
+        self.trace = bool(ativo)
+        if self.trace:
+            _configurar_logger_trace()
+    
+    def _trace(self, mensagem, *args):
+        """Registra uma mensagem de trace; a formatação só ocorre se o logger emitir.
+        
+        Quem chama deve testar self.trace antes, para que o trace desligado
+        custe apenas a leitura de um atributo.
+        """
+        _logger_trace_taf.debug(mensagem, *args)
+    
     def interpretar_taf(self, taf_text):
+        """Interpreta TAF, reaproveitando o resultado se o texto bruto já foi visto"""
+        interpretacao = self._interpretacoes.get(taf_text)
+        if interpretacao is None:
+            interpretacao = self._interpretar_taf(taf_text)
+            self._interpretacoes.put(taf_text, interpretacao)
+        return interpretacao
+    
+    def _interpretar_taf(self, taf_text):
         """Interpreta TAF unindo linhas que pertencem à mesma previsão"""
         try:
-            print("🔍 INICIANDO INTERPRETAÇÃO DO TAF")
-            print("=" * 50)
+            if self.trace:
+                self._trace("🔍 INICIANDO INTERPRETAÇÃO DO TAF\n%s", "=" * 50)
         
             # Primeiro, une linhas que foram quebradas erroneamente
             taf_corrigido = self._corrigir_quebras_linha(taf_text)
@@ -276,9 +828,10 @@ class TAFInterpreter:
             # Agora divide em blocos lógicos
             blocos = self._dividir_em_blocos_logicos(taf_corrigido)
         
+            cabecalho = GrupoTAF(blocos[0])
             interpretacao = {
-                'aerodromo': self._extrair_aerodromo(blocos[0]),
-                'validade': self._extrair_validade(blocos[0]),
+                'aerodromo': self._extrair_aerodromo(cabecalho),
+                'validade': self._extrair_validade(cabecalho),
                 'previsoes': []
             }
         
@@ -294,9 +847,64 @@ class TAFInterpreter:
             return interpretacao
         
         except Exception as e:
-            print(f"❌ Erro na interpretação: {e}")
+            # Erro sempre registrado (não depende do trace) e mantido no resultado
+            _logger_taf.warning("❌ Erro na interpretação TAF: %s", e)
             return {'erro': f'Erro na interpretação TAF: {str(e)}', 'raw': taf_text}
 
+    def decodificar_taf(self, taf_text):
+        """Decodifica TAF em um TAFDecodificado (valores numéricos).
+        
+        Os textos no formato de interpretar_taf saem de .como_dict().
+        Retorna None se o TAF não puder ser decodificado.
+        """
+        try:
+            blocos = self._dividir_em_blocos_logicos(self._corrigir_quebras_linha(taf_text))
+            cabecalho = GrupoTAF(blocos[0])
+            
+            return TAFDecodificado(
+                aerodromo=cabecalho.aerodromo or "N/A",
+                validade=_periodo_grupo(cabecalho),
+                previsoes=tuple(self._decodificar_bloco(bloco) for bloco in blocos[1:]),
+                descricoes=self.weather_descriptions,
+                descricoes_nuvens=self.cloud_descriptions
+            )
+        
+        except Exception as e:
+            if self.trace:
+                self._trace("❌ Erro na decodificação: %s", e)
+            return None
+    
+    def _decodificar_bloco(self, bloco):
+        """Decodifica um bloco completo do TAF em PrevisaoTAF"""
+        bloco = bloco.upper().strip()
+        grupo = GrupoTAF(bloco)
+        previsao = PrevisaoTAF(
+            tipo=self._codigo_tipo_previsao(bloco),
+            cavok=grupo.cavok,
+            texto=bloco
+        )
+        
+        if grupo.fm:
+            previsao.a_partir_de = _dia_hora(grupo.fm)
+        periodo = _periodo_grupo(grupo)
+        if periodo:
+            previsao.inicio, previsao.fim = periodo
+        
+        if grupo.vento:
+            direcao, velocidade, _, rajada = grupo.vento
+            previsao.vento = _vento_numerico(direcao, velocidade, rajada, variavel=direcao == 'VRB')
+        
+        if not grupo.cavok:
+            if grupo.visibilidade_m:
+                previsao.visibilidade_m = int(grupo.visibilidade_m)
+            elif grupo.visibilidade_sm:
+                milhas, fracao = grupo.visibilidade_sm
+                previsao.visibilidade_milhas = float(f"{milhas}.{fracao}" if fracao else milhas)
+            previsao.condicoes = tuple(self._codigos_condicoes(bloco))
+            previsao.nuvens = tuple(CamadaNuvem(tipo, int(altura) * 100) for tipo, altura in grupo.nuvens)
+        
+        return previsao
+    
     def _corrigir_quebras_linha(self, taf_text):
         """Corrige quebras de linha que separam previsões erroneamente"""
         padroes_continuacao = ['TEMPO', 'PROB', 'BECMG', 'FM']
@@ -315,7 +923,8 @@ class TAFInterpreter:
                 if any(linha_seguinte.startswith(padrao) for padrao in padroes_continuacao):
                     if any(linha_atual.endswith(padrao) for padrao in ['PROB40', 'PROB30', 'PROB']):
                         linha_unida = linha_atual + ' ' + linha_seguinte
-                        print(f"🔗 Unindo linhas: '{linha_atual}' + '{linha_seguinte}' = '{linha_unida}'")
+                        if self.trace:
+                            self._trace("🔗 Unindo linhas: '%s' + '%s' = '%s'", linha_atual, linha_seguinte, linha_unida)
                         linhas_corrigidas.append(linha_unida)
                         i += 2  # Pula duas linhas
                         continue
@@ -357,13 +966,14 @@ class TAFInterpreter:
     def _interpretar_bloco_completo(self, bloco):
         """Interpreta um bloco completo do TAF"""
         bloco = bloco.upper().strip()
+        grupo = GrupoTAF(bloco)  # Tokeniza uma vez; os extratores leem daqui
     
         tipo = self._extrair_tipo_previsao(bloco)
-        if self.cavok(bloco):
+        if grupo.cavok:
             previsao = {
                 'tipo': tipo,
-                'periodo': self._extrair_periodo(bloco),
-                'vento': self._extrair_vento(bloco),
+                'periodo': self._extrair_periodo(grupo),
+                'vento': self._extrair_vento(grupo),
                 'visibilidade': "≥10km (CAVOK)",
                 'condicoes': "CAVOK - Ceiling and Visibility OK ✅",
                 'nuvens': "Sem nuvens significativas",
@@ -372,11 +982,11 @@ class TAFInterpreter:
         else:
             previsao = {
                 'tipo': tipo,
-                'periodo': self._extrair_periodo(bloco),
-                'vento': self._extrair_vento(bloco),
-                'visibilidade': self._extrair_visibilidade(bloco),
+                'periodo': self._extrair_periodo(grupo),
+                'vento': self._extrair_vento(grupo),
+                'visibilidade': self._extrair_visibilidade(grupo),
                 'condicoes': self._extrair_condicoes(bloco),
-                'nuvens': self._extrair_nuvens(bloco),
+                'nuvens': self._extrair_nuvens(grupo),
                 'texto_original': bloco
             }
     
@@ -384,117 +994,83 @@ class TAFInterpreter:
     
     def _extrair_aerodromo(self, texto):
         """Extrai código do aeródromo"""
-        match = re.search(r'(?:^|\s)([A-Z]{4})(?:\s|$)', texto)
-        return match.group(1) if match else "N/A"
+        return _grupo_taf(texto).aerodromo or "N/A"
     
     def _extrair_validade(self, texto):
         """Extrai período de validade do TAF"""
-        match = re.search(r'(\d{4}/\d{4})', texto)
-        if match:
-            periodo = match.group(1)
-            dia_inicio = periodo[:2]
-            hora_inicio = periodo[2:4]
-            dia_fim = periodo[5:7]
-            hora_fim = periodo[7:9]
-            
-            # Se os dias são iguais, mostrar apenas horários
-            if dia_inicio == dia_fim:
-                return f"Das {hora_inicio}Z às {hora_fim}Z (dia {dia_inicio})"
-            else:
-                return f"Das {hora_inicio}Z (dia {dia_inicio}) às {hora_fim}Z (dia {dia_fim})"
+        periodo = _periodo_grupo(_grupo_taf(texto))
+        if periodo:
+            # Se os dias são iguais, mostra apenas horários
+            return formatar_periodo(*periodo[0], *periodo[1])
         return "N/A"
     
     def _extrair_tipo_previsao(self, linha):
         """Extrai tipo de previsão da LINHA COMPLETA"""
+        return TIPOS_PREVISAO[self._codigo_tipo_previsao(linha)]
+    
+    def _codigo_tipo_previsao(self, linha):
+        """Código do tipo de previsão (chave de TIPOS_PREVISAO)"""
         linha = linha.upper().strip()
     
         # Ordem CRÍTICA: verifica combinações completas primeiro
-        if 'PROB40 TEMPO' in linha:
-            return 'PROB40 TEMPO (40% chance temporária) ⚡'
-        elif 'PROB30 TEMPO' in linha:
-            return 'PROB30 TEMPO (30% chance temporária) ⚡'
-        elif 'PROB40' in linha:
-            return 'PROB40 (40% chance) 📊'
-        elif 'PROB30' in linha:
-            return 'PROB30 (30% chance) 📊'
-        elif 'FM' in linha:
-            return 'FROM (a partir de) 🕒'
-        elif 'BECMG' in linha:
-            return 'BECOMING (tornando-se) 🔄'
-        elif 'TEMPO' in linha:
-            return 'TEMPORARY (temporário) ⏱️'
-        elif 'PROB' in linha:
-            return 'PROBABILITY (probabilidade) 📈'
-        else:
-            return 'PRINCIPAL (previsão principal) 📍'
+        for codigo in ('PROB40 TEMPO', 'PROB30 TEMPO', 'PROB40', 'PROB30', 'FM', 'BECMG', 'TEMPO', 'PROB'):
+            if codigo in linha:
+                return codigo
+        return 'PRINCIPAL'
     
     def _extrair_periodo(self, texto):
         """Extrai período da previsão - CORRIGIDA para formato DDHH/DDHH"""
+        grupo = _grupo_taf(texto)
+        
         # Formato FMHHMM (FM + hora e minuto) - raro em TAFs
-        match_fm = re.search(r'FM(\d{4})', texto)
-        if match_fm:
-            hora_min = match_fm.group(1)
+        if grupo.fm:
+            hora_min = grupo.fm
             return f"A partir das {hora_min[:2]}:{hora_min[2:]}Z"
         
         # Formato DDHH/DDHH (dia+hora) - COMUM em TAFs
-        match_periodo = re.search(r'(\d{4})/(\d{4})', texto)
-        if match_periodo:
-            inicio = match_periodo.group(1)
-            fim = match_periodo.group(2)
-            
-            dia_inicio = inicio[:2]
-            hora_inicio = inicio[2:]
-            dia_fim = fim[:2]
-            hora_fim = fim[2:]
-            
-            # Formatar para mostrar corretamente
-            if dia_inicio == dia_fim:
-                return f"Das {hora_inicio}Z às {hora_fim}Z (dia {dia_inicio})"
-            else:
-                return f"Das {hora_inicio}Z (dia {dia_inicio}) às {hora_fim}Z (dia {dia_fim})"
+        periodo = _periodo_grupo(grupo)
+        if periodo:
+            return formatar_periodo(*periodo[0], *periodo[1])
         
         return "Período não especificado"
     
     def _extrair_vento(self, texto):
         """Extrai informações de vento"""
-        # Busca padrões de vento com KT
-        match = re.search(r'(\d{3}|VRB)(\d{2,3})(G(\d{2,3}))?KT', texto)
-        if match:
-            direcao, velocidade, _, rajada = match.groups()
+        grupo = _grupo_taf(texto)
+        
+        # Padrões de vento com KT
+        if grupo.vento:
+            direcao, velocidade, _, rajada = grupo.vento
             if rajada:
                 return f"Vento de {direcao}° a {velocidade} nós com rajadas de {rajada} nós"
             else:
                 return f"Vento de {direcao}° a {velocidade} nós"
         
         # Verifica se há "00000KT" (vento calmo)
-        if '00000KT' in texto:
+        if '00000KT' in grupo.texto:
             return "Vento calmo"
         
         return "Vento não especificado"
     
     def _extrair_visibilidade(self, texto):
         try:
-            # Remove explicitamente os padrões que causam confusão
-            texto_limpo = re.sub(r'\d{5}KT', '', texto)    # Remove vento
-            texto_limpo = re.sub(r'VRB\d{2}KT', '', texto_limpo)  # Remove vento variável
-            texto_limpo = re.sub(r'\d{6}Z', '', texto_limpo)     # Remove data/hora
-            texto_limpo = re.sub(r'\d{4}/\d{4}', '', texto_limpo) # Remove validade
-        
-            # Agora busca o primeiro grupo de 4 dígitos (visibilidade em metros)
-            match = re.search(r'\b(\d{4})\b', texto_limpo)
-            if match:
-                return f"{match.group(1)} metros"
-        
-            # Busca visibilidade em milhas (ex: 2SM)
-            match_sm = re.search(r'(\d+)(?:\.(\d+))?SM', texto)
-            if match_sm:
-                if match_sm.group(2):
-                    return f"{match_sm.group(1)}.{match_sm.group(2)} milhas"
+            grupo = _grupo_taf(texto)
+            
+            # Primeiro grupo de 4 dígitos (visibilidade em metros), ignorando
+            # vento, data/hora e validade, que já foram removidos na tokenização
+            if grupo.visibilidade_m:
+                return f"{grupo.visibilidade_m} metros"
+        
+            # Visibilidade em milhas (ex: 2SM)
+            if grupo.visibilidade_sm:
+                milhas, fracao = grupo.visibilidade_sm
+                if fracao:
+                    return f"{milhas}.{fracao} milhas"
                 else:
-                    return f"{match_sm.group(1)} milhas"
+                    return f"{milhas} milhas"
         
             # Busca 9999 que é visibilidade ≥ 10km
-            if '9999' in texto:
+            if '9999' in grupo.texto:
                 return "≥10km"
                 
             return "Visibilidade não especificada"
@@ -503,32 +1079,39 @@ class TAFInterpreter:
             return "Visibilidade não especificada"
     
     def _extrair_condicoes(self, texto):
-        """Extrai condições meteorológicas - CORRIGIDA"""
-        condicoes = []
-        
-        # Primeiro, buscar combinações compostas (como TSRA, TSSN, etc.)
-        for codigo, descricao in self.weather_descriptions.items():
-            # Usar regex para encontrar o código como palavra completa
-            if re.search(r'\b' + re.escape(codigo) + r'\b', texto):
-                condicoes.append(descricao)
+        """Extrai condições meteorológicas com uma única varredura do texto"""
+        codigos = self._codigos_condicoes(texto)
         
         # Se encontrou condições, retorna
-        if condicoes:
-            return ", ".join(condicoes)
+        if codigos:
+            return ", ".join(self.weather_descriptions[codigo] for codigo in codigos)
         
         # Se não encontrou condições específicas
         return "Condições normais"
     
+    def _codigos_condicoes(self, texto):
+        """Códigos de tempo presentes no texto, na ordem de weather_descriptions"""
+        encontrados = set()
+        for match in self._re_condicoes.finditer(texto):
+            sinal, codigo = match.groups()
+            encontrados.add(codigo)
+            if sinal:
+                encontrados.add(sinal + codigo)
+        
+        # Mantém a ordem do dicionário (compostas antes das simples: TSRA antes de RA)
+        return sorted(
+            (codigo for codigo in encontrados if codigo in self._ordem_condicoes),
+            key=self._ordem_condicoes.__getitem__
+        )
+    
     def _extrair_nuvens(self, texto):
         """Extrai informações de nuvens"""
-        if self.cavok(texto):
+        grupo = _grupo_taf(texto)
+        if grupo.cavok:
             return "Sem nuvens significativas"
         
         nuvens = []
-        # Busca todos os padrões de nuvens
-        matches = re.findall(r'(FEW|SCT|BKN|OVC|VV)(\d{3})', texto)
-        
-        for tipo, altura in matches:
+        for tipo, altura in grupo.nuvens:
             desc = self.cloud_descriptions.get(tipo, tipo)
             # Converter altura de centenas de pés para pés
             altura_pes = int(altura) * 100
@@ -539,14 +1122,47 @@ class TAFInterpreter:
 class AutoUpdateManager:
     """Gerencia todas as atualizações automáticas (METAR/TAF e Satélite)"""
     
-    def __init__(self):
+    def __init__(self, config_file="metapi_auto_update.json"):
         self.is_running = False
         self.ui_callback = None
-        self.config_file = "metapi_auto_update.json"
+        self.config_file = config_file  # .db/.sqlite usa o backend SQLite
+        self.persistencia = criar_persistencia(config_file)
+        self._lock_config = self.persistencia.lock_config  # segurado em toda alteração de self.config
+        atexit.register(self.persistencia.flush)  # Não perde a janela pendente ao sair
         self.config = self._load_config()
         self.event_queue = queue.Queue()
-        self.metar_interpreter = MetarInterpreter()
-        self.taf_interpreter = TAFInterpreter()
+        self.sessao_http = get_sessao_http()
+        self.cache_produtos = CacheProdutos(arquivo="metapi_cache_produtos.json")
+        self.metar_interpreter = MetarInterpreter(self.sessao_http, self.cache_produtos)
+        self.taf_interpreter = TAFInterpreter(self.sessao_http, self.cache_produtos)
+        self._ultimo_conteudo_metar = {}  # icao -> (metar_texto, taf_texto) do último evento
+        # Última análise de satélite por região; limiar em bits do hash perceptual (None: só idênticas)
+        self.cache_quadros = CacheQuadros(self.config.get("limiar_quadro_perceptual"))
+        self._detectores_satelite = {}  # codigo -> DetectorIncremental (quadro anterior da região)
+        self._lock_detectores = threading.Lock()
+        self._arquivos_satelite = {}    # codigo -> ArquivoQuadros (histórico em disco)
+        self._lock_arquivos = threading.Lock()
+        
+        # Próximas execuções em heap (tempo monotônico); chaves ("satelite", codigo) / ("metar_taf", icao)
+        self.agendador = Agendador()
+        self._updates_satelite = {}  # codigo -> update da config
+        self._updates_metar = {}     # icao -> update da config
+        self._parar_servico = None
+        self._agendar_config()
+        
+        # Pools limitados; uma atualização ainda em andamento não é disparada de novo
+        self.executor_satelite = ExecutorTarefas(
+            "satelite", self.config.get("max_satelite_simultaneos", MAX_SATELITE_SIMULTANEOS))
+        self.executor_metar = ExecutorTarefas(
+            "metar", self.config.get("max_metar_simultaneos", MAX_METAR_SIMULTANEOS))
+        
+        # Backend de METAR/TAF: "threads" (requests) ou "async" (MotorMetarAsync)
+        self.motor_async = None
+        self.set_backend_metar(self.config.get("backend_metar", "threads"))
+        
+        # Análise das imagens de satélite em processos separados (0: threads deste processo)
+        self.processamento_satelite = None
+        self.set_processos_satelite(self.config.get("processos_satelite", PROCESSOS_SATELITE))
         
         # Inicia processador de eventos
         threading.Thread(target=self._event_processor, daemon=True).start()
@@ -563,22 +1179,32 @@ class AutoUpdateManager:
             "ativo": False
         }
         
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-        except:
-            pass
-        
-        return default_config
+        return self.persistencia.carregar(default_config)
     
-    def _save_config(self):
-        """Salva configurações"""
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-        except:
-            pass
+    def _save_config(self, alterados=(), removidos=()):
+        """Marca a configuração para salvar (gravações próximas são agrupadas)"""
+        self.persistencia.salvar(self.config, alterados, removidos)
+    
+    def _agendar_config(self):
+        """Indexa as atualizações da config e agenda as ativas (ISO lido só aqui)"""
+        agora = datetime.now()
+        for chave_lista, campo, indice in (("satelite_updates", "codigo", self._updates_satelite),
+                                           ("metar_updates", "icao", self._updates_metar)):
+            for update in self.config.get(chave_lista, []):
+                indice[update[campo]] = update
+                if not update.get("ativo", True):
+                    continue
+                try:
+                    atraso = (datetime.fromisoformat(update["proxima_atualizacao"]) - agora).total_seconds()
+                except (KeyError, TypeError, ValueError):
+                    atraso = 0
+                self.agendador.agendar((update["tipo"], update[campo]), atraso)
+    
+    def _registrar_execucao(self, update, agora):
+        """Grava horários da última e da próxima execução na config"""
+        update["ultima_atualizacao"] = agora.isoformat()
+        nova_proxima = agora + timedelta(minutes=update["intervalo"])
+        update["proxima_atualizacao"] = nova_proxima.isoformat()
     
     def set_ui_callback(self, callback):
         """Define callback para UI"""
@@ -599,15 +1225,19 @@ class AutoUpdateManager:
             "ativo": True
         }
         
-        # Remove duplicatas
-        self.config["satelite_updates"] = [
-            u for u in self.config.get("satelite_updates", [])
-            if not (u.get("tipo") == "satelite" and u.get("codigo") == regiao_codigo)
-        ]
+        with self._lock_config:
+            # Remove duplicatas
+            self.config["satelite_updates"] = [
+                u for u in self.config.get("satelite_updates", [])
+                if not (u.get("tipo") == "satelite" and u.get("codigo") == regiao_codigo)
+            ]
+            
+            self.config["satelite_updates"].append(update)
+            self.config["ativo"] = True
+            self._save_config(alterados=[update])
         
-        self.config["satelite_updates"].append(update)
-        self.config["ativo"] = True
-        self._save_config()
+        self._updates_satelite[regiao_codigo] = update
+        self.agendador.agendar(("satelite", regiao_codigo))
         
         print(f"✅ Satélite configurado: {regiao_nome} a cada {intervalo_minutos}min")
         return True
@@ -626,19 +1256,98 @@ class AutoUpdateManager:
             "ativo": True
         }
         
-        # Remove duplicatas
-        self.config["metar_updates"] = [
-            u for u in self.config.get("metar_updates", [])
-            if not (u.get("tipo") == "metar_taf" and u.get("icao") == icao)
-        ]
+        with self._lock_config:
+            # Remove duplicatas
+            self.config["metar_updates"] = [
+                u for u in self.config.get("metar_updates", [])
+                if not (u.get("tipo") == "metar_taf" and u.get("icao") == icao)
+            ]
+            
+            self.config["metar_updates"].append(update)
+            self.config["ativo"] = True
+            self._save_config(alterados=[update])
         
-        self.config["metar_updates"].append(update)
-        self.config["ativo"] = True
-        self._save_config()
+        self._updates_metar[icao] = update
+        self.agendador.agendar(("metar_taf", icao))
         
         print(f"✅ METAR/TAF configurado: {icao} a cada {intervalo_minutos}min")
         return True
     
+    def set_backend_metar(self, backend):
+        """Escolhe o backend de METAR/TAF: "threads" ou "async" (um event loop para todas as estações)"""
+        if backend == "async" and self.motor_async is None:
+            from metapi_async import MotorMetarAsync
+            self.motor_async = MotorMetarAsync(
+                self.metar_interpreter, self.taf_interpreter, self.cache_produtos,
+                url_metar=self.config.get("url_metar", URL_METAR),
+                url_taf=self.config.get("url_taf", URL_TAF),
+                max_requisicoes=self.config.get("max_requisicoes_async", 8),
+                timeout=self.config.get("timeout_async", 15)
+            )
+        elif backend != "async" and self.motor_async is not None:
+            self.motor_async.encerrar()
+            self.motor_async = None
+        
+        if self.config.get("backend_metar", "threads") != backend:
+            with self._lock_config:
+                self.config["backend_metar"] = backend
+                self._save_config()
+            print(f"✈️ Backend METAR/TAF: {backend}")
+    
+    def set_processos_satelite(self, processos):
+        """Define quantos processos analisam as imagens de satélite (0: threads deste processo)"""
+        if self.processamento_satelite is not None:
+            self.processamento_satelite.encerrar()
+            self.processamento_satelite = None
+        
+        if processos > 0:
+            from processamento_satelite import ProcessamentoSatelite
+            try:
+                self.processamento_satelite = ProcessamentoSatelite(
+                    processos, incremental=self.config.get("deteccao_incremental", True))
+            except Exception as e:
+                print(f"⚠️ Processos de satélite indisponíveis ({e}); usando threads")
+        
+        if self.config.get("processos_satelite", PROCESSOS_SATELITE) != processos:
+            with self._lock_config:
+                self.config["processos_satelite"] = processos
+                self._save_config()
+            print(f"🛰️ Processos de satélite: {processos}")
+    
+    def remove_satelite_update(self, regiao_codigo):
+        """Remove atualização de satélite"""
+        update = self._updates_satelite.pop(regiao_codigo, None)
+        self.agendador.remover(("satelite", regiao_codigo))
+        # Libera os quadros guardados da região
+        with self._lock_detectores:
+            self._detectores_satelite.pop(regiao_codigo, None)
+        self.cache_quadros.invalidar(regiao_codigo)
+        if self.processamento_satelite is not None:
+            self.processamento_satelite.descartar(regiao_codigo)
+        if update is None:
+            return False
+        
+        with self._lock_config:
+            self.config["satelite_updates"] = [u for u in self.config.get("satelite_updates", []) if u is not update]
+            self._save_config(removidos=[update])
+        print(f"🗑️ Satélite removido: {update.get('nome', regiao_codigo)}")
+        return True
+    
+    def remove_metar_update(self, icao):
+        """Remove atualização de METAR/TAF"""
+        update = self._updates_metar.pop(icao, None)
+        self.agendador.remover(("metar_taf", icao))
+        # Se o aeródromo voltar, o primeiro resultado precisa chegar à UI
+        self._ultimo_conteudo_metar.pop(icao, None)
+        if update is None:
+            return False
+        
+        with self._lock_config:
+            self.config["metar_updates"] = [u for u in self.config.get("metar_updates", []) if u is not update]
+            self._save_config(removidos=[update])
+        print(f"🗑️ METAR/TAF removido: {icao}")
+        return True
+    
     def _event_processor(self):
         """Processa eventos para UI"""
         while True:
@@ -654,78 +1363,246 @@ class AutoUpdateManager:
         self.event_queue.put((tipo, dados))
     
     def execute_satelite_update(self, regiao_codigo, regiao_nome):
-        """Executa atualização de satélite"""
+        """Executa atualização de satélite de uma única região"""
+        return self.execute_satelite_update_lote([(regiao_codigo, regiao_nome)])
+    
+    def execute_satelite_update_lote(self, regioes):
+        """Executa atualização de várias regiões [(codigo, nome)] em uma única sessão de captura.
+        
+        Cada imagem segue para detecção/alerta assim que fica pronta (em
+        paralelo, com processos de satélite). As análises concluídas são
+        arquivadas e publicadas por esta thread entre uma captura e outra (e
+        no fim), sem esperar as demais; regiões que falharem são reagendadas
+        para mais cedo.
+        """
         try:
-            print(f"🛰️ Executando update satélite: {regiao_nome}")
+            print(f"🛰️ Executando update satélite: {', '.join(nome for _, nome in regioes)}")
             
-            from satelite_utils import inicio, obter_imagem_com_selenium, detectar_cores, emitir_alerta
+            from satelite_utils import inicio, obter_imagens
             
-            regiao = inicio(regiao_codigo)
-            imagem = obter_imagem_com_selenium(regiao)
-            mascara_vermelho, mascara_amarelo = detectar_cores(imagem)
-            imagem_alerta = emitir_alerta(imagem, mascara_vermelho, mascara_amarelo)
+            por_regiao = {inicio(codigo): (codigo, nome) for codigo, nome in regioes}
+            falhas = []
+            # Análises concluídas; o callback só enfileira, o disco e a UI ficam com esta thread
+            prontas = queue.Queue()
+            aguardando = 0
             
-            # Converte para base64 para envio
-            _, buffer = cv2.imencode('.jpg', imagem_alerta)
-            img_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            # Atualiza timestamp
-            agora = datetime.now()
-            for update in self.config.get("satelite_updates", []):
-                if update.get("codigo") == regiao_codigo:
-                    update["ultima_atualizacao"] = agora.isoformat()
-                    nova_proxima = agora + timedelta(minutes=update["intervalo"])
-                    update["proxima_atualizacao"] = nova_proxima.isoformat()
-                    break
-            
-            self._save_config()
+            def publicar(regiao_codigo, regiao_nome, imagem, futuro):
+                try:
+                    self._registrar_analise_satelite(regiao_codigo, regiao_nome, imagem, futuro.result())
+                except Exception as e:
+                    print(f"❌ Erro satélite ({regiao_nome}): {e}")
+                    falhas.append(regiao_codigo)
             
-            # Notifica UI
-            self._notify_ui("satelite_update", {
-                "regiao": regiao_nome,
-                "codigo": regiao_codigo,
-                "hora": agora.strftime('%H:%M:%S'),
-                "tempestades": bool(mascara_vermelho.any()),
-                "chuva": bool(mascara_amarelo.any()),
-                "imagem": img_base64
-            })
+            for regiao, imagem in obter_imagens(list(por_regiao)):
+                regiao_codigo, regiao_nome = por_regiao[regiao]
+                try:
+                    if isinstance(imagem, Exception):
+                        raise imagem
+                    futuro = self.analisar_imagem_satelite(regiao_codigo, imagem)
+                except Exception as e:
+                    print(f"❌ Erro satélite ({regiao_nome}): {e}")
+                    falhas.append(regiao_codigo)
+                    continue
+                aguardando += 1
+                futuro.add_done_callback(lambda futuro, pronta=(regiao_codigo, regiao_nome, imagem):
+                                         prontas.put((*pronta, futuro)))
+                # Publica as que já terminaram (sem processos: a desta região) antes da próxima captura
+                while not prontas.empty():
+                    publicar(*prontas.get())
+                    aguardando -= 1
             
-            return True
+            for _ in range(aguardando):
+                publicar(*prontas.get())
             
         except Exception as e:
             print(f"❌ Erro satélite: {e}")
-            return False
+            falhas = [codigo for codigo, _ in regioes]
+        
+        for regiao_codigo in falhas:
+            self._reagendar_falha(("satelite", regiao_codigo))
+        return not falhas
+    
+    def _processar_imagem_satelite(self, regiao_codigo, regiao_nome, imagem):
+        """Detecta tempestades/chuva na imagem, atualiza a agenda e notifica a UI"""
+        self._registrar_analise_satelite(regiao_codigo, regiao_nome, imagem,
+                                         self.analisar_imagem_satelite(regiao_codigo, imagem).result())
+    
+    def _registrar_analise_satelite(self, regiao_codigo, regiao_nome, imagem, analise):
+        """Guarda um quadro novo no histórico da região e publica a análise"""
+        if not analise["sem_mudancas"]:
+            self._arquivar_quadro(regiao_codigo, imagem, analise)
+        self._publicar_analise_satelite(regiao_codigo, regiao_nome, analise)
+    
+    def analisar_imagem_satelite(self, regiao_codigo, imagem, avulsa=False):
+        """Inicia a análise da imagem; retorna um Future com tempestades, chuva, imagem_bgr e sem_mudancas.
+        
+        Se a imagem da região não mudou desde a última análise (cache por
+        conteúdo), o Future já vem pronto com o resultado anterior. Com
+        processos de satélite ativos, a detecção roda fora deste processo.
+        
+        avulsa=True (análise manual da UI): detecção completa, sem consultar
+        nem alimentar o cache de quadros e o detector incremental da região,
+        que ficam só com as atualizações automáticas.
+        """
+        from satelite_utils import dhash_quadro, hash_quadro
+        
+        imagem = np.asarray(imagem)
+        resultado = Future()
+        if not avulsa:
+            hash_bruto = hash_quadro(imagem)
+            hash_perceptual = dhash_quadro(imagem) if self.cache_quadros.limiar_perceptual is not None else None
+            analise = self.cache_quadros.consultar(regiao_codigo, hash_bruto, hash_perceptual)
+            if analise is not None:
+                resultado.set_result(dict(analise, sem_mudancas=True))
+                return resultado
+        
+        incremental = not avulsa and self.config.get("deteccao_incremental", True)
+        processamento = self.processamento_satelite
+        if processamento is not None:
+            futuro = processamento.submeter(regiao_codigo, imagem, incremental)
+        else:
+            futuro = Future()
+            try:
+                futuro.set_result(self._detectar_satelite_local(regiao_codigo, imagem, incremental))
+            except Exception as e:
+                futuro.set_exception(e)
+        
+        def concluir(futuro):
+            from satelite_utils import CLASSE_CHUVA, CLASSE_TEMPESTADE, tem_celulas
+            try:
+                celulas, imagem_alerta = futuro.result()
+                analise = {
+                    "tempestades": tem_celulas(celulas, CLASSE_TEMPESTADE),
+                    "chuva": tem_celulas(celulas, CLASSE_CHUVA),
+                    # BGR uint8 contíguo (altura, largura, 3), enviado sem cópia nem codificação
+                    "imagem_bgr": np.ascontiguousarray(imagem_alerta)
+                }
+                if not avulsa:
+                    self.cache_quadros.guardar(regiao_codigo, hash_bruto, analise, hash_perceptual)
+                resultado.set_result(dict(analise, sem_mudancas=False))
+            except Exception as e:
+                resultado.set_exception(e)
+        
+        futuro.add_done_callback(concluir)
+        return resultado
+    
+    def arquivo_satelite(self, regiao_codigo):
+        """Histórico circular (ArquivoQuadros) da região, ou None se desativado"""
+        capacidade = self.config.get("quadros_arquivo_satelite", QUADROS_ARQUIVO_SATELITE)
+        if capacidade <= 0:
+            return None
+        
+        with self._lock_arquivos:
+            arquivo = self._arquivos_satelite.get(regiao_codigo)
+            if arquivo is None:
+                diretorio = self.config.get("diretorio_arquivo_satelite", DIRETORIO_ARQUIVO_SATELITE)
+                caminho = os.path.join(diretorio, f"regiao_{regiao_codigo}.quadros")
+                arquivo = self._arquivos_satelite[regiao_codigo] = ArquivoQuadros(caminho, capacidade)
+            return arquivo
+    
+    def _arquivar_quadro(self, regiao_codigo, imagem, analise):
+        """Guarda a imagem bruta e a anotada no histórico da região"""
+        try:
+            arquivo = self.arquivo_satelite(regiao_codigo)
+            if arquivo is not None:
+                arquivo.adicionar(imagem, analise["imagem_bgr"],
+                                  tempestades=analise["tempestades"], chuva=analise["chuva"])
+        except Exception as e:
+            print(f"⚠️ Erro ao arquivar quadro de satélite: {e}")
+    
+    def _detectar_satelite_local(self, regiao_codigo, imagem, incremental=True):
+        """Detecção e anotação neste processo; retorna (células, imagem BGR anotada)"""
+        from satelite_utils import DetectorIncremental, detectar_cores, emitir_alerta, extrair_celulas
+        
+        if incremental:
+            # Refaz só os blocos que mudaram desde o quadro anterior da região
+            with self._lock_detectores:
+                detector = self._detectores_satelite.get(regiao_codigo)
+                if detector is None:
+                    detector = self._detectores_satelite[regiao_codigo] = DetectorIncremental()
+            _, celulas = detector.detectar(imagem)
+            return celulas, emitir_alerta(imagem, None, None, celulas)
+        
+        mascara_vermelho, mascara_amarelo = detectar_cores(imagem)
+        celulas = extrair_celulas(mascara_vermelho, mascara_amarelo)
+        return celulas, emitir_alerta(imagem, mascara_vermelho, mascara_amarelo, celulas)
+    
+    def _publicar_analise_satelite(self, regiao_codigo, regiao_nome, analise):
+        """Registra a execução da região e envia a análise para a UI"""
+        if analise["sem_mudancas"]:
+            print(f"♻️ Satélite {regiao_nome}: imagem sem mudanças, reaproveitando a análise anterior")
+        
+        # Atualiza timestamp
+        agora = datetime.now()
+        update = self._updates_satelite.get(regiao_codigo)
+        if update is not None:
+            with self._lock_config:
+                self._registrar_execucao(update, agora)
+                self._save_config(alterados=[update])
+        
+        # Notifica UI (sem_mudancas: mesma imagem_bgr do evento anterior da região)
+        self._notify_ui("satelite_update", {
+            "regiao": regiao_nome,
+            "codigo": regiao_codigo,
+            "hora": agora.strftime('%H:%M:%S'),
+            **analise
+        })
     
     def execute_metar_update(self, icao):
-        """Executa atualização de METAR/TAF usando as classes já existentes"""
+        """Executa atualização de METAR/TAF de um único aeródromo"""
+        return self.execute_metar_update_lote([icao])
+    
+    def execute_metar_update_lote(self, icaos):
+        """Executa atualização de METAR/TAF de vários aeródromos (uma requisição por produto).
+        
+        Retorna False se nenhum aeródromo teve METAR; os que falharam em um
+        lote parcialmente bem-sucedido são reagendados mais cedo individualmente.
+        """
         try:
-            print(f"✈️ Executando update METAR/TAF: {icao}")
+            print(f"✈️ Executando update METAR/TAF: {', '.join(icaos)}")
             
             # Usa os interpretadores já inicializados
-            resultado_metar = self.metar_interpreter.obter_metar_taf(icao)
-            resultado_taf = self.taf_interpreter.obter_taf(icao)
+            if self.motor_async is not None:
+                resultados_metar, resultados_taf = self.motor_async.obter_lote(icaos)
+            else:
+                resultados_metar = self.metar_interpreter.obter_metar_lote(icaos)
+                resultados_taf = self.taf_interpreter.obter_taf_lote(icaos)
+            self.cache_produtos.salvar()
             
-            # Atualiza timestamp
+            # Atualiza timestamps
             agora = datetime.now()
-            for update in self.config.get("metar_updates", []):
-                if update.get("icao") == icao:
-                    update["ultima_atualizacao"] = agora.isoformat()
-                    nova_proxima = agora + timedelta(minutes=update["intervalo"])
-                    update["proxima_atualizacao"] = nova_proxima.isoformat()
-                    break
+            atualizados = [self._updates_metar[icao] for icao in resultados_metar if icao in self._updates_metar]
+            if atualizados:
+                with self._lock_config:
+                    for update in atualizados:
+                        self._registrar_execucao(update, agora)
+                    self._save_config(alterados=atualizados)
             
-            self._save_config()
-            
-            # Notifica UI com dados completos
-            self._notify_ui("metar_update", {
-                "icao": icao,
-                "hora": agora.strftime('%H:%M:%S'),
-                "resultado_metar": resultado_metar,
-                "resultado_taf": resultado_taf,
-                "metar_texto": resultado_metar.get('metar') if resultado_metar.get('sucesso') else None,
-                "taf_texto": resultado_taf.get('taf') if resultado_taf.get('sucesso') else None
-            })
+            # Notifica UI com dados completos de cada aeródromo (só se o conteúdo mudou)
+            for icao, resultado_metar in resultados_metar.items():
+                resultado_taf = resultados_taf.get(icao, {'sucesso': False, 'erro': 'TAF não disponível'})
+                metar_texto = resultado_metar.get('metar') if resultado_metar.get('sucesso') else None
+                taf_texto = resultado_taf.get('taf') if resultado_taf.get('sucesso') else None
+                
+                if self._ultimo_conteudo_metar.get(icao) == (metar_texto, taf_texto):
+                    continue
+                self._ultimo_conteudo_metar[icao] = (metar_texto, taf_texto)
+                
+                self._notify_ui("metar_update", {
+                    "icao": icao,
+                    "hora": agora.strftime('%H:%M:%S'),
+                    "resultado_metar": resultado_metar,
+                    "resultado_taf": resultado_taf,
+                    "metar_texto": metar_texto,
+                    "taf_texto": taf_texto
+                })
             
+            falhas = [icao for icao in icaos if not resultados_metar.get(icao, {}).get('sucesso')]
+            if len(falhas) == len(icaos):
+                print(f"❌ METAR/TAF indisponível para todo o lote: {', '.join(icaos)}")
+                return False
+            for icao in falhas:
+                self._reagendar_falha(("metar_taf", icao))
             return True
             
         except Exception as e:
@@ -733,44 +1610,54 @@ class AutoUpdateManager:
             return False
     
     def check_and_execute_updates(self):
-        """Verifica e executa atualizações pendentes"""
-        agora = datetime.now()
+        """Executa as atualizações vencidas (sem bloquear)"""
+        self._despachar(self.agendador.retirar_vencidas())
+    
+    def _despachar(self, vencidas):
+        """Dispara as atualizações vencidas e já agenda a próxima de cada uma"""
+        regioes_pendentes = []
+        icaos_pendentes = []
+        for tipo, chave in vencidas:
+            if tipo == "satelite":
+                if chave in self._updates_satelite:
+                    self.agendador.agendar((tipo, chave), self._updates_satelite[chave]["intervalo"] * 60)
+                    regioes_pendentes.append((tipo, chave))
+            elif chave in self._updates_metar:
+                self.agendador.agendar((tipo, chave), self._updates_metar[chave]["intervalo"] * 60)
+                icaos_pendentes.append((tipo, chave))
+        
+        # Regiões vencidas vão juntas para uma única sessão de captura,
+        # sem as que ainda estão em andamento
+        if regioes_pendentes:
+            self.executor_satelite.submeter_lote(
+                regioes_pendentes,
+                lambda livres: self.execute_satelite_update_lote([
+                    (codigo, self._updates_satelite[codigo]["nome"])
+                    for _, codigo in livres if codigo in self._updates_satelite
+                ])
+            )
         
-        # Verifica satélites
-        for update in self.config.get("satelite_updates", []):
-            if update.get("ativo", True):
-                proxima_str = update.get("proxima_atualizacao")
-                if proxima_str:
-                    try:
-                        proxima = datetime.fromisoformat(proxima_str)
-                        if agora >= proxima:
-                            # Executa em thread separada
-                            threading.Thread(
-                                target=self.execute_satelite_update,
-                                args=(update["codigo"], update["nome"]),
-                                daemon=True
-                            ).start()
-                    except:
-                        pass
-        
-        # Verifica METARs
-        for update in self.config.get("metar_updates", []):
-            if update.get("ativo", True):
-                proxima_str = update.get("proxima_atualizacao")
-                if proxima_str:
-                    try:
-                        proxima = datetime.fromisoformat(proxima_str)
-                        if agora >= proxima:
-                            # Executa em thread separada
-                            threading.Thread(
-                                target=self.execute_metar_update,
-                                args=(update["icao"],),
-                                daemon=True
-                            ).start()
-                    except:
-                        pass
-        
-        self._save_config()
+        # Todos os METARs vencidos vão em um único lote, sem os que ainda estão em andamento
+        if icaos_pendentes:
+            self.executor_metar.submeter_lote(
+                icaos_pendentes,
+                lambda livres: self._executar_agendado(
+                    livres, self.execute_metar_update_lote, [icao for _, icao in livres])
+            )
+    
+    def _executar_agendado(self, chaves, funcao, *args):
+        """Executa uma atualização; em caso de falha, tenta de novo mais cedo"""
+        if funcao(*args):
+            return True
+        
+        for chave in chaves:
+            self._reagendar_falha(chave)
+        return False
+    
+    def _reagendar_falha(self, chave):
+        """Antecipa a próxima tentativa de uma atualização que falhou (se ainda agendada)"""
+        if chave in self.agendador:
+            self.agendador.agendar(chave, ATRASO_NOVA_TENTATIVA)
     
     def start_service(self):
         """Inicia o serviço de auto-update"""
@@ -779,18 +1666,21 @@ class AutoUpdateManager:
         
         print("🟢 INICIANDO AUTO-UPDATE SERVICE")
         self.is_running = True
-        self.config["ativo"] = True
-        self._save_config()
+        with self._lock_config:
+            self.config["ativo"] = True
+            self._save_config()
+        
+        parar = self._parar_servico = threading.Event()
         
         def service_loop():
             print("🔄 Service loop iniciado")
-            while self.is_running:
+            while not parar.is_set():
                 try:
-                    self.check_and_execute_updates()
-                    time.sleep(10)  # Verifica a cada 10 segundos
+                    # Dorme até a próxima atualização vencer (ou até add/remove/stop)
+                    self._despachar(self.agendador.aguardar(continuar=lambda: not parar.is_set()))
                 except Exception as e:
                     print(f"❌ Erro no service loop: {e}")
-                    time.sleep(30)
+                    parar.wait(30)
         
         threading.Thread(target=service_loop, daemon=True).start()
         print("✅ Auto-update service ativo!")
@@ -799,18 +1689,45 @@ class AutoUpdateManager:
         """Para o serviço"""
         print("🔴 Parando auto-update service")
         self.is_running = False
-        self.config["ativo"] = False
-        self._save_config()
+        if self._parar_servico is not None:
+            self._parar_servico.set()
+            self.agendador.acordar()
+        with self._lock_config:
+            self.config["ativo"] = False
+            self._save_config()
+        self.persistencia.flush()
     
     def get_status(self):
         """Retorna status do serviço"""
+        from satelite_utils import URL_IMAGEM_DIRETA
+        
         return {
             "running": self.is_running,
             "ativo": self.config.get("ativo", False),
             "satelite_count": len(self.config.get("satelite_updates", [])),
             "metar_count": len(self.config.get("metar_updates", [])),
             "satelite_updates": self.config.get("satelite_updates", []),
-            "metar_updates": self.config.get("metar_updates", [])
+            "metar_updates": self.config.get("metar_updates", []),
+            "agendadas": len(self.agendador),
+            "proxima_em": self.agendador.proxima(),
+            "execucao": {
+                "satelite": self.executor_satelite.estatisticas(),
+                "metar": self.executor_metar.estatisticas()
+            },
+            "backend_metar": "async" if self.motor_async is not None else "threads",
+            "async": self.motor_async.estatisticas() if self.motor_async is not None else None,
+            "http": self.sessao_http.estatisticas(),
+            "cache": self.cache_produtos.estatisticas(),
+            "cache_satelite": self.cache_quadros.estatisticas(),
+            # None: busca direta desativada (sem METAPI_URL_IMAGEM_SATELITE), tudo pelo navegador
+            "busca_direta_satelite": URL_IMAGEM_DIRETA,
+            "processamento_satelite": (self.processamento_satelite.estatisticas()
+                                       if self.processamento_satelite is not None else None),
+            "arquivo_satelite": {codigo: arquivo.estatisticas()
+                                 for codigo, arquivo in list(self._arquivos_satelite.items())},
+            "deteccao_satelite": {codigo: detector.estatisticas()
+                                  for codigo, detector in list(self._detectores_satelite.items())},
+            "persistencia": self.persistencia.estatisticas()
         }
 
 # Singleton global
@@ -0,0 +1,181 @@
+"""
+metapi_async.py - Motor asyncio para consulta de METAR/TAF em lote
+
+Um único event loop (em uma thread própria) baixa e decodifica METAR/TAF
+de muitos aeródromos ao mesmo tempo, com limite de requisições simultâneas,
+timeout por requisição HTTP (cada uma leva várias estações) e cancelamento.
+Usa aiohttp se estiver instalado; sem ele, cada requisição roda na SessaoHTTP
+em uma thread auxiliar.
+
+Uso:
+    motor = MotorMetarAsync(MetarInterpreter(), TAFInterpreter())
+    resultados_metar, resultados_taf = motor.obter_lote(["SBGR", "SBBR"])
+    motor.encerrar()
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from http_utils import get_sessao_http
+from metapi import (MAX_IDS_POR_REQUISICAO, URL_METAR, URL_TAF, _cabecalhos_condicionais,
+                    _dividir_lotes, _normalizar_icaos, _registrar_resposta_lote,
+                    _separar_atuais_em_cache)
+
+class MotorMetarAsync:
+    """Busca METAR e TAF de várias estações em um event loop dedicado.
+    
+    O timeout vale por requisição HTTP, não por estação: cada requisição
+    leva até `estacoes_por_requisicao` estações, e todas elas recebem o erro
+    no resultado se ela falhar ou expirar, sem afetar as demais requisições.
+    Com estacoes_por_requisicao=1 o timeout passa a ser por estação.
+    """
+    
+    def __init__(self, metar_interpreter, taf_interpreter, cache=None, url_metar=URL_METAR,
+                 url_taf=URL_TAF, max_requisicoes=8, estacoes_por_requisicao=MAX_IDS_POR_REQUISICAO,
+                 timeout=15):
+        self.metar_interpreter = metar_interpreter
+        self.taf_interpreter = taf_interpreter
+        self.cache = cache
+        self.url_metar = url_metar
+        self.url_taf = url_taf
+        self.max_requisicoes = max_requisicoes
+        self.estacoes_por_requisicao = estacoes_por_requisicao
+        self.timeout = timeout
+        
+        self._loop = asyncio.new_event_loop()
+        self._semaforo = None
+        self._sessao_aiohttp = None
+        self._pendentes = set()  # concurrent.futures.Future das consultas em andamento
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._executar_loop, name="metapi-async", daemon=True)
+        self._thread.start()
+    
+    def _executar_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+    
+    def obter_lote(self, icao_codes, timeout_total=None):
+        """Versão bloqueante de obter_lote_async (pode ser chamada de qualquer thread).
+        
+        Se timeout_total expirar, a consulta é cancelada e as estações ficam com erro.
+        """
+        icaos = _normalizar_icaos(icao_codes)
+        futuro = asyncio.run_coroutine_threadsafe(self.obter_lote_async(icaos), self._loop)
+        with self._lock:
+            self._pendentes.add(futuro)
+        try:
+            return futuro.result(timeout_total)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            futuro.cancel()
+            erro = {'sucesso': False, 'erro': 'Consulta cancelada'}
+            return {icao: dict(erro) for icao in icaos}, {icao: dict(erro) for icao in icaos}
+        finally:
+            with self._lock:
+                self._pendentes.discard(futuro)
+    
+    async def obter_lote_async(self, icao_codes):
+        """Baixa METAR e TAF das estações em paralelo.
+        
+        Retorna (resultados_metar, resultados_taf) no formato de
+        MetarInterpreter.obter_metar_lote / TAFInterpreter.obter_taf_lote.
+        """
+        icaos = _normalizar_icaos(icao_codes)
+        (textos_metar, erros_metar), (textos_taf, erros_taf) = await asyncio.gather(
+            self._obter_produto(self.url_metar, "metar", icaos),
+            self._obter_produto(self.url_taf, "taf", icaos)
+        )
+        return (
+            self.metar_interpreter.montar_resultados_lote(icaos, textos_metar, erros_metar),
+            self.taf_interpreter.montar_resultados_lote(icaos, textos_taf, erros_taf)
+        )
+    
+    async def _obter_produto(self, url_base, produto, icaos):
+        """Retorna ({icao: texto}, {icao: erro}) de um produto"""
+        textos, pendentes = _separar_atuais_em_cache(icaos, produto, self.cache)
+        erros = {}
+        lotes = _dividir_lotes(pendentes, self.estacoes_por_requisicao)
+        
+        respostas = await asyncio.gather(
+            *(self._requisitar(url_base, produto, lote) for lote in lotes),
+            return_exceptions=True
+        )
+        
+        for lote, resposta in zip(lotes, respostas):
+            if isinstance(resposta, asyncio.CancelledError):
+                raise resposta
+            if isinstance(resposta, BaseException):
+                mensagem = "Tempo esgotado" if isinstance(resposta, asyncio.TimeoutError) else str(resposta)
+                erros.update((icao, mensagem) for icao in lote)
+                continue
+            status, corpo, headers = resposta
+            _registrar_resposta_lote(textos, self.cache, produto, lote, status, corpo, headers)
+        
+        return textos, erros
+    
+    async def _requisitar(self, url_base, produto, lote):
+        """Uma requisição (todo o lote) limitada pelo semáforo e pelo timeout; retorna (status, corpo, headers)"""
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_requisicoes)
+        
+        url = f"{url_base}?ids={','.join(lote)}"
+        headers = _cabecalhos_condicionais(self.cache, produto, lote)
+        async with self._semaforo:
+            return await asyncio.wait_for(self._get(url, headers), self.timeout)
+    
+    async def _get(self, url, headers):
+        if aiohttp is None:
+            # Sem aiohttp: usa a sessão HTTP bloqueante em uma thread auxiliar
+            response = await asyncio.to_thread(get_sessao_http().get, url, headers=headers)
+            return response.status_code, response.text, response.headers
+        
+        if self._sessao_aiohttp is None:
+            self._sessao_aiohttp = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_requisicoes)
+            )
+        async with self._sessao_aiohttp.get(url, headers=headers) as response:
+            return response.status, await response.text(), response.headers
+    
+    def cancelar(self):
+        """Cancela todas as consultas em andamento"""
+        with self._lock:
+            pendentes = list(self._pendentes)
+        for futuro in pendentes:
+            futuro.cancel()
+        return len(pendentes)
+    
+    def estatisticas(self):
+        """Consultas em andamento e cliente HTTP em uso"""
+        with self._lock:
+            em_andamento = len(self._pendentes)
+        return {
+            "cliente": "aiohttp" if aiohttp is not None else "requests",
+            "consultas_em_andamento": em_andamento,
+            "max_requisicoes": self.max_requisicoes
+        }
+    
+    async def _finalizar(self):
+        """Espera as tarefas canceladas terminarem e fecha a sessão aiohttp"""
+        tarefas = [tarefa for tarefa in asyncio.all_tasks() if tarefa is not asyncio.current_task()]
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        if self._sessao_aiohttp is not None:
+            await self._sessao_aiohttp.close()
+            self._sessao_aiohttp = None
+    
+    def encerrar(self):
+        """Cancela as consultas, fecha a sessão, para e fecha o event loop"""
+        self.cancelar()
+        try:
+            asyncio.run_coroutine_threadsafe(self._finalizar(), self._loop).result(5)
+        except concurrent.futures.TimeoutError:
+            print("⚠️ Consultas METAR/TAF não terminaram a tempo no encerramento")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        if not self._thread.is_alive():
+            self._loop.close()
\ No newline at end of file
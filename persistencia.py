@@ -0,0 +1,237 @@
+"""
+persistencia.py - Persistência da configuração do auto-update
+
+Alterações são só marcadas (dirty) e gravadas juntas depois de uma janela
+de espera, sob lock. Quem altera a config deve segurar `lock_config`; cada
+gravação copia a config sob esse lock e serializa a cópia. Dois backends com
+a mesma interface:
+
+- PersistenciaJSON: reescreve o JSON inteiro de forma atômica (.tmp + os.replace)
+- PersistenciaSQLite: grava só as atualizações alteradas/removidas, em uma transação
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+ATRASO_MAXIMO_NOVA_TENTATIVA = 300  # segundos; depois de falhas seguidas a espera dobra até aqui
+
+# Listas de atualizações da config -> campo que identifica cada atualização
+LISTAS_ATUALIZACOES = {
+    "satelite_updates": "codigo",
+    "metar_updates": "icao",
+}
+
+def _lista_da_atualizacao(update):
+    return "satelite_updates" if update.get("tipo") == "satelite" else "metar_updates"
+
+def criar_persistencia(arquivo, atraso=2.0):
+    """Escolhe o backend pela extensão do arquivo (.db/.sqlite -> SQLite, demais -> JSON)"""
+    if arquivo.endswith((".db", ".sqlite", ".sqlite3")):
+        return PersistenciaSQLite(arquivo, atraso)
+    return PersistenciaJSON(arquivo, atraso)
+
+class _PersistenciaAdiada:
+    """Base: agrupa pedidos de gravação em uma janela de `atraso` segundos"""
+    
+    def __init__(self, arquivo, atraso=2.0):
+        self.arquivo = arquivo
+        self.atraso = atraso
+        self._lock = threading.Lock()          # estado pendente
+        self._lock_escrita = threading.Lock()  # uma gravação por vez
+        self.lock_config = threading.RLock()   # alterações na config (compartilhado com o dono dela)
+        self._config = None
+        self._alterado = False
+        self._timer = None
+        self._gravacoes = 0
+        self._pedidos = 0
+        self._falhas_seguidas = 0
+    
+    def salvar(self, config, alterados=(), removidos=()):
+        """Marca a config como alterada; a gravação acontece após a janela de espera.
+        
+        alterados/removidos são as atualizações (dicts) que mudaram, usadas
+        por backends que gravam de forma incremental.
+        """
+        with self._lock:
+            self._config = config
+            self._alterado = True
+            self._pedidos += 1
+            self._registrar_pendencias(alterados, removidos)
+            if self._timer is None:
+                self._agendar(self.atraso)
+    
+    def _agendar(self, atraso):
+        # Chamado com self._lock
+        self._timer = threading.Timer(atraso, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def flush(self):
+        """Grava imediatamente o que estiver pendente"""
+        with self._lock_escrita:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._alterado:
+                    return
+                self._alterado = False
+                config = self._config
+                pendencias = self._retirar_pendencias()
+            
+            # Cópia sob o lock de quem altera a config: a serialização não vê
+            # listas/dicts mudando no meio (add/remove em outra thread)
+            with self.lock_config:
+                config, pendencias = copy.deepcopy((config, pendencias))
+            
+            try:
+                self._gravar(config, *pendencias)
+                self._gravacoes += 1
+                self._falhas_seguidas = 0
+            except Exception as e:
+                # Mantém o pedido para a próxima tentativa, cada vez mais espaçada (ex.: disco só leitura)
+                self._falhas_seguidas += 1
+                atraso = min(self.atraso * 2 ** self._falhas_seguidas, ATRASO_MAXIMO_NOVA_TENTATIVA)
+                print(f"❌ Erro ao salvar configuração: {e} (nova tentativa em {atraso:.0f}s)")
+                with self._lock:
+                    self._devolver_pendencias(*pendencias)
+                    if not self._alterado:
+                        self._config = config
+                        self._alterado = True
+                    if self._timer is None:
+                        self._agendar(atraso)
+    
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "arquivo": self.arquivo,
+                "pedidos": self._pedidos,
+                "gravacoes": self._gravacoes,
+                "falhas_seguidas": self._falhas_seguidas,
+                "pendente": self._alterado
+            }
+    
+    def fechar(self):
+        self.flush()
+    
+    # Ganchos para backends incrementais
+    def _registrar_pendencias(self, alterados, removidos):
+        pass
+    
+    def _retirar_pendencias(self):
+        return ()
+    
+    def _devolver_pendencias(self, *pendencias):
+        pass
+
+class PersistenciaJSON(_PersistenciaAdiada):
+    """Config inteira em um arquivo JSON, reescrito de forma atômica"""
+    
+    def carregar(self, padrao):
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, 'r') as f:
+                    return json.load(f)
+        except Exception:
+            pass
+        return padrao
+    
+    def _gravar(self, config):
+        # Serializa antes de abrir o arquivo: uma falha não deixa o JSON pela metade
+        dados = json.dumps(config, indent=4)
+        temporario = self.arquivo + ".tmp"
+        with open(temporario, 'w') as f:
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo)
+
+class PersistenciaSQLite(_PersistenciaAdiada):
+    """Config em SQLite: uma linha por atualização e uma por opção.
+    
+    Cada gravação altera só as atualizações marcadas como alteradas ou
+    removidas desde a última, o que mantém barato salvar agendas grandes.
+    """
+    
+    def __init__(self, arquivo, atraso=2.0):
+        super().__init__(arquivo, atraso)
+        self._alterados = {}   # (lista, chave) -> update
+        self._removidos = set()
+        with self._conexao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS atualizacoes ("
+                " lista TEXT NOT NULL, chave TEXT NOT NULL, dados TEXT NOT NULL,"
+                " PRIMARY KEY (lista, chave))"
+            )
+            conexao.execute("CREATE TABLE IF NOT EXISTS opcoes (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+    
+    @contextmanager
+    def _conexao(self):
+        """Conexão curta: commit (ou rollback) ao sair do bloco e fechamento"""
+        conexao = sqlite3.connect(self.arquivo, timeout=10)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+    
+    def carregar(self, padrao):
+        try:
+            with self._conexao() as conexao:
+                opcoes = conexao.execute("SELECT chave, valor FROM opcoes").fetchall()
+                linhas = conexao.execute("SELECT lista, dados FROM atualizacoes ORDER BY rowid").fetchall()
+        except sqlite3.Error:
+            return padrao
+        
+        if not opcoes and not linhas:
+            return padrao
+        
+        config = dict(padrao)
+        config.update((chave, json.loads(valor)) for chave, valor in opcoes)
+        for lista in LISTAS_ATUALIZACOES:
+            config[lista] = []
+        for lista, dados in linhas:
+            config.setdefault(lista, []).append(json.loads(dados))
+        return config
+    
+    def _registrar_pendencias(self, alterados, removidos):
+        for update in alterados:
+            chave = self._chave(update)
+            self._removidos.discard(chave)
+            self._alterados[chave] = update
+        for update in removidos:
+            chave = self._chave(update)
+            self._alterados.pop(chave, None)
+            self._removidos.add(chave)
+    
+    def _retirar_pendencias(self):
+        alterados, removidos = self._alterados, self._removidos
+        self._alterados, self._removidos = {}, set()
+        return alterados, removidos
+    
+    def _devolver_pendencias(self, alterados, removidos):
+        for chave, update in alterados.items():
+            self._alterados.setdefault(chave, update)
+        self._removidos |= removidos - set(self._alterados)
+    
+    @staticmethod
+    def _chave(update):
+        lista = _lista_da_atualizacao(update)
+        return lista, str(update.get(LISTAS_ATUALIZACOES[lista]))
+    
+    def _gravar(self, config, alterados, removidos):
+        opcoes = [(chave, json.dumps(valor)) for chave, valor in config.items()
+                  if chave not in LISTAS_ATUALIZACOES]
+        linhas = [(lista, chave, json.dumps(update)) for (lista, chave), update in alterados.items()]
+        
+        with self._conexao() as conexao:
+            conexao.executemany(
+                "INSERT INTO opcoes (chave, valor) VALUES (?, ?)"
+                " ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor", opcoes)
+            conexao.executemany(
+                "INSERT INTO atualizacoes (lista, chave, dados) VALUES (?, ?, ?)"
+                " ON CONFLICT(lista, chave) DO UPDATE SET dados = excluded.dados", linhas)
+            conexao.executemany("DELETE FROM atualizacoes WHERE lista = ? AND chave = ?", list(removidos))
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+processamento_satelite.py - Detecção e anotação de imagens de satélite em processos separados
+
+A classificação de cores, a extração de células e o desenho dos alertas
+rodam em processos trabalhadores, fora do processo da interface (sem
+disputar o GIL com o Kivy). Os quadros vão e voltam por memória
+compartilhada; do processo trabalhador só volta o array de células.
+
+Cada região é sempre enviada ao mesmo processo, que mantém o
+DetectorIncremental dela; regiões em processos diferentes são
+processadas em paralelo.
+
+Processos "spawn" reexecutam o script de entrada do programa; ele precisa
+poder ser reimportado sem efeitos (interface.py se marca para não ser
+reexecutado, senão cada trabalhador abriria outra janela Kivy).
+
+Uso:
+    processamento = ProcessamentoSatelite(processos=2)
+    celulas, imagem_bgr = processamento.submeter("1", imagem_rgb).result()
+    processamento.encerrar()
+"""
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Estado de cada processo trabalhador: região -> DetectorIncremental
+_detectores = {}
+
+def _processar_quadro(regiao, nome_entrada, nome_saida, forma, incremental):
+    """Executa no processo trabalhador: detecta e anota o quadro da memória compartilhada"""
+    from satelite_utils import DetectorIncremental, detectar_cores, emitir_alerta, extrair_celulas
+    
+    entrada = shared_memory.SharedMemory(name=nome_entrada)
+    saida = shared_memory.SharedMemory(name=nome_saida)
+    try:
+        imagem = np.ndarray(forma, np.uint8, buffer=entrada.buf)
+        imagem_bgr = np.ndarray(forma, np.uint8, buffer=saida.buf)
+        if incremental:
+            detector = _detectores.get(regiao)
+            if detector is None:
+                detector = _detectores[regiao] = DetectorIncremental()
+            _, celulas = detector.detectar(imagem)
+        else:
+            mascara_vermelho, mascara_amarelo = detectar_cores(imagem)
+            celulas = extrair_celulas(mascara_vermelho, mascara_amarelo)
+        emitir_alerta(imagem, None, None, celulas, saida=imagem_bgr)
+        return celulas
+    finally:
+        # As views precisam sumir antes de fechar a memória compartilhada
+        imagem = imagem_bgr = None
+        entrada.close()
+        saida.close()
+
+def _descartar_detector(regiao):
+    """Executa no processo trabalhador: libera o quadro anterior guardado da região"""
+    return _detectores.pop(regiao, None) is not None
+
+def _iniciar():
+    return True
+
+class ProcessamentoSatelite:
+    """Pool de processos (um executor de um processo por vaga) com afinidade por região.
+    
+    submeter() copia o quadro RGB para a memória compartilhada e retorna um
+    Future com (células, imagem anotada BGR). Um processo que morrer é
+    recriado no próximo envio para a vaga dele.
+    """
+    
+    def __init__(self, processos=2, incremental=True):
+        self.processos = processos
+        self.incremental = incremental
+        self._contexto = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._executores = [self._criar_executor() for _ in range(processos)]
+        self._enviados = 0
+        self._concluidos = 0
+        self._falhas = 0
+        self._em_andamento = 0
+        self._reiniciados = 0
+    
+    def _criar_executor(self):
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=self._contexto)
+        # Sobe o processo já em vez de no primeiro quadro
+        executor.submit(_iniciar)
+        return executor
+    
+    def _vaga(self, regiao):
+        return zlib.crc32(str(regiao).encode()) % self.processos
+    
+    def _enviar(self, regiao, funcao, *args):
+        vaga = self._vaga(regiao)
+        with self._lock:
+            try:
+                return self._executores[vaga].submit(funcao, *args)
+            except BrokenProcessPool:
+                # Processo morreu (ex.: falta de memória): recria só a vaga dele e tenta de novo
+                self._executores[vaga].shutdown(wait=False)
+                self._executores[vaga] = self._criar_executor()
+                self._reiniciados += 1
+                return self._executores[vaga].submit(funcao, *args)
+    
+    def submeter(self, regiao, imagem, incremental=None):
+        """Envia o quadro RGB da região; retorna Future com (células, imagem BGR anotada).
+        
+        incremental=False faz a detecção completa sem mexer no quadro
+        anterior guardado da região (padrão: o do construtor).
+        """
+        if incremental is None:
+            incremental = self.incremental
+        imagem = np.ascontiguousarray(imagem, dtype=np.uint8)
+        entrada = shared_memory.SharedMemory(create=True, size=imagem.nbytes)
+        saida = shared_memory.SharedMemory(create=True, size=imagem.nbytes)
+        resultado = Future()
+        
+        def concluir(futuro):
+            try:
+                celulas = futuro.result()
+                imagem_bgr = np.ndarray(imagem.shape, np.uint8, buffer=saida.buf).copy()
+                erro = None
+            except Exception as e:
+                erro = e
+            finally:
+                for memoria in (entrada, saida):
+                    memoria.close()
+                    memoria.unlink()
+            with self._lock:
+                self._em_andamento -= 1
+                if erro is None:
+                    self._concluidos += 1
+                else:
+                    self._falhas += 1
+            if erro is None:
+                resultado.set_result((celulas, imagem_bgr))
+            else:
+                resultado.set_exception(erro)
+        
+        try:
+            np.ndarray(imagem.shape, np.uint8, buffer=entrada.buf)[:] = imagem
+            futuro = self._enviar(regiao, _processar_quadro, regiao, entrada.name, saida.name,
+                                  imagem.shape, incremental)
+        except Exception:
+            for memoria in (entrada, saida):
+                memoria.close()
+                memoria.unlink()
+            raise
+        
+        with self._lock:
+            self._enviados += 1
+            self._em_andamento += 1
+        futuro.add_done_callback(concluir)
+        return resultado
+    
+    def processar(self, regiao, imagem, timeout=None):
+        """Versão bloqueante de submeter(): retorna (células, imagem BGR anotada)"""
+        return self.submeter(regiao, imagem).result(timeout)
+    
+    def descartar(self, regiao):
+        """Libera o quadro anterior da região guardado no processo dela"""
+        try:
+            self._enviar(regiao, _descartar_detector, regiao)
+        except RuntimeError:
+            pass
+    
+    def estatisticas(self):
+        """Processos, quadros em andamento e contadores acumulados"""
+        with self._lock:
+            return {
+                "processos": self.processos,
+                "incremental": self.incremental,
+                "em_andamento": self._em_andamento,
+                "enviados": self._enviados,
+                "concluidos": self._concluidos,
+                "falhas": self._falhas,
+                "reiniciados": self._reiniciados
+            }
+    
+    def encerrar(self, esperar=False):
+        """Encerra os processos trabalhadores"""
+        with self._lock:
+            executores = list(self._executores)
+        # Sem o lock: os callbacks de conclusão rodam nas threads que shutdown() espera
+        for executor in executores:
+            executor.shutdown(wait=esperar, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+resultados.py - Tipos compactos para METAR/TAF decodificados
+
+Os interpretadores de metapi.py devolvem dicionários de textos prontos
+("Vento de 090° a 10 nós"). Estes tipos guardam só os valores numéricos
+(vento, visibilidade em metros, camadas de nuvens, temperatura, QNH) e
+montam os textos apenas quando como_dict() é chamado.
+
+Requer Python 3.10+ (@dataclass(slots=True)).
+"""
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+# Código do tipo de previsão -> texto exibido
+TIPOS_PREVISAO = {
+    'PROB40 TEMPO': 'PROB40 TEMPO (40% chance temporária) ⚡',
+    'PROB30 TEMPO': 'PROB30 TEMPO (30% chance temporária) ⚡',
+    'PROB40': 'PROB40 (40% chance) 📊',
+    'PROB30': 'PROB30 (30% chance) 📊',
+    'FM': 'FROM (a partir de) 🕒',
+    'BECMG': 'BECOMING (tornando-se) 🔄',
+    'TEMPO': 'TEMPORARY (temporário) ⏱️',
+    'PROB': 'PROBABILITY (probabilidade) 📈',
+    'PRINCIPAL': 'PRINCIPAL (previsão principal) 📍',
+}
+
+def formatar_periodo(dia_inicio, hora_inicio, dia_fim, hora_fim):
+    """Texto de um período DDHH/DDHH"""
+    if dia_inicio == dia_fim:
+        return f"Das {hora_inicio:02d}Z às {hora_fim:02d}Z (dia {dia_inicio:02d})"
+    return f"Das {hora_inicio:02d}Z (dia {dia_inicio:02d}) às {hora_fim:02d}Z (dia {dia_fim:02d})"
+
+class CamadaNuvem(NamedTuple):
+    """Camada de nuvens: cobertura (FEW/SCT/BKN/OVC/VV), altura em pés e o que vier
+    depois da altura no token (CB, TCU, ///...)"""
+    cobertura: str
+    altura_pes: Optional[int]
+    tipo: Optional[str] = None
+
+@dataclass(slots=True, frozen=True)
+class Vento:
+    """Vento decodificado; direcao None quando variável ou não informada.
+    
+    digitos_* guardam quantos dígitos o relatório usou (05 ou 005), para o
+    texto sair igual ao original.
+    """
+    direcao: Optional[int]
+    velocidade: Optional[int]
+    rajada: Optional[int] = None
+    variavel: bool = False
+    unidade: str = 'KT'
+    digitos_velocidade: int = 2
+    digitos_rajada: int = 2
+    
+    def _texto_velocidade(self):
+        texto = f"a {self.velocidade:0{self.digitos_velocidade}d} nós"
+        if self.rajada is not None:
+            texto += f" com rajadas de {self.rajada:0{self.digitos_rajada}d} nós"
+        return texto
+
+@dataclass(slots=True)
+class MetarDecodificado:
+    """METAR decodificado com valores numéricos"""
+    aerodromo: str
+    data_hora: Optional[str] = None
+    vento: Optional[Vento] = None
+    visibilidade_m: Optional[int] = None
+    temperatura: Optional[int] = None
+    orvalho: Optional[int] = None
+    qnh: Optional[int] = None
+    condicoes: tuple = ()   # Códigos (ex.: '-RA', 'TSRA')
+    nuvens: tuple = ()      # CamadaNuvem
+    cavok: bool = False
+    descricoes: dict = field(default=None, repr=False, compare=False)
+    
+    def _texto_vento(self):
+        vento = self.vento
+        if vento.variavel:
+            return "Vento variável"
+        if vento.direcao is None or vento.velocidade is None:
+            return "Informações de vento não disponíveis"
+        return f"Vento de {vento.direcao:03d}° {vento._texto_velocidade()}"
+    
+    def como_dict(self):
+        """Mesmo formato de MetarInterpreter.interpretar_metar"""
+        if self.cavok:
+            info = {'cavok': True, 'condicoes': 'CAVOK - Ceiling and Visibility OK ✅', 'aerodromo': self.aerodromo}
+        else:
+            info = {'aerodromo': self.aerodromo}
+        
+        if self.data_hora:
+            info['data_hora'] = self.data_hora
+        if self.vento:
+            info['vento'] = self._texto_vento()
+        if self.visibilidade_m is not None and not self.cavok:
+            info['visibilidade'] = f"{self.visibilidade_m:04d} metros"
+        if self.temperatura is not None:
+            info['temperatura'] = f"{self.temperatura:02d}°C"
+            info['orvalho'] = f"{self.orvalho:02d}°C"
+        if self.qnh is not None:
+            info['qnh'] = f"{self.qnh:04d} hPa"
+        
+        if self.cavok:
+            info['visibilidade'] = '10km+ 🌤️'
+            info['nuvens'] = 'Sem nuvens abaixo de 5000 pés ☀️'
+            return info
+        
+        descricoes = self.descricoes or {}
+        condicoes = [descricoes.get(codigo, codigo) for codigo in self.condicoes]
+        info['condicoes'] = ", ".join(condicoes) if condicoes else "Sem tempo presente significativo"
+        
+        nuvens = [
+            camada.cobertura
+            + ('' if camada.altura_pes is None else f"{camada.altura_pes // 100:03d}")
+            + (camada.tipo or '')
+            for camada in self.nuvens
+        ]
+        info['nuvens'] = ", ".join(nuvens) if nuvens else "Sem nuvens significativas"
+        return info
+
+@dataclass(slots=True)
+class PrevisaoTAF:
+    """Grupo de mudança do TAF decodificado"""
+    tipo: str                              # Chave de TIPOS_PREVISAO
+    inicio: Optional[tuple] = None         # (dia, hora)
+    fim: Optional[tuple] = None            # (dia, hora)
+    a_partir_de: Optional[tuple] = None    # 4 dígitos após FM, via _dia_hora: (dia, hora) em FMDDHHMM
+    vento: Optional[Vento] = None
+    visibilidade_m: Optional[int] = None
+    visibilidade_milhas: Optional[float] = None
+    condicoes: tuple = ()
+    nuvens: tuple = ()
+    cavok: bool = False
+    texto: str = ''
+    
+    def _texto_periodo(self):
+        if self.a_partir_de:
+            # Mesmo texto do interpretador, que mostra os 4 dígitos como HH:MM
+            dia, hora = self.a_partir_de
+            return f"A partir das {dia:02d}:{hora:02d}Z"
+        if self.inicio and self.fim:
+            return formatar_periodo(*self.inicio, *self.fim)
+        return "Período não especificado"
+    
+    def _texto_vento(self):
+        vento = self.vento
+        if vento is None:
+            return "Vento não especificado"
+        direcao = 'VRB' if vento.variavel else f"{vento.direcao:03d}"
+        return f"Vento de {direcao}° {vento._texto_velocidade()}"
+    
+    def _texto_visibilidade(self):
+        if self.visibilidade_m is not None:
+            return f"{self.visibilidade_m:04d} metros"
+        if self.visibilidade_milhas is not None:
+            return f"{self.visibilidade_milhas:g} milhas"
+        return "Visibilidade não especificada"
+    
+    def como_dict(self, descricoes=None, descricoes_nuvens=None):
+        """Mesmo formato de cada item de TAFInterpreter.interpretar_taf()['previsoes']"""
+        previsao = {
+            'tipo': TIPOS_PREVISAO[self.tipo],
+            'periodo': self._texto_periodo(),
+            'vento': self._texto_vento(),
+        }
+        
+        if self.cavok:
+            previsao.update({
+                'visibilidade': "≥10km (CAVOK)",
+                'condicoes': "CAVOK - Ceiling and Visibility OK ✅",
+                'nuvens': "Sem nuvens significativas",
+            })
+        else:
+            descricoes = descricoes or {}
+            descricoes_nuvens = descricoes_nuvens or {}
+            condicoes = [descricoes.get(codigo, codigo) for codigo in self.condicoes]
+            nuvens = [
+                f"{descricoes_nuvens.get(camada.cobertura, camada.cobertura)} a {camada.altura_pes} pés"
+                for camada in self.nuvens
+            ]
+            previsao.update({
+                'visibilidade': self._texto_visibilidade(),
+                'condicoes': ", ".join(condicoes) if condicoes else "Condições normais",
+                'nuvens': ", ".join(nuvens) if nuvens else "Sem nuvens significativas",
+            })
+        
+        previsao['texto_original'] = self.texto
+        return previsao
+
+@dataclass(slots=True)
+class TAFDecodificado:
+    """TAF decodificado: cabeçalho e grupos de mudança"""
+    aerodromo: str
+    validade: Optional[tuple] = None   # ((dia, hora), (dia, hora))
+    previsoes: tuple = ()
+    descricoes: dict = field(default=None, repr=False, compare=False)
+    descricoes_nuvens: dict = field(default=None, repr=False, compare=False)
+    
+    def como_dict(self):
+        """Mesmo formato de TAFInterpreter.interpretar_taf"""
+        return {
+            'aerodromo': self.aerodromo,
+            'validade': formatar_periodo(*self.validade[0], *self.validade[1]) if self.validade else "N/A",
+            'previsoes': [
+                previsao.como_dict(self.descricoes, self.descricoes_nuvens)
+                for previsao in self.previsoes
+            ]
+        }
\ No newline at end of file
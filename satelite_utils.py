@@ -4,14 +4,68 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from PIL import Image, ImageDraw, ImageFont
 import cv2
 import numpy as np
 from io import BytesIO
+import atexit
 import base64
+import hashlib
+import json
+import queue
+import threading
 import time
 import emoji
 import os
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timezone
+from http_utils import SessaoHTTP
+
+URL_SATELITE = "https://satelite.inmet.gov.br/"
+TIMEOUT_ESPERA = 15  # segundos (esperas explícitas por elementos da página)
+TIMEOUT_TROCA_IMAGEM = 5  # segundos esperando a imagem mudar após o clique em TN
+TEMPO_IMAGEM_ESTAVEL = 0.5  # segundos parada para a imagem contar como carregada, se não trocar
+INTERVALO_VERIFICACAO = 0.1  # segundos entre verificações da imagem na página
+
+# Endpoint da imagem para a busca direta, sem navegador ({regiao}: códigos de inicio();
+# {produto}: TN...; {data}: AAAA-MM-DD UTC). Opcional: o endpoint usado pela página do
+# INMET não está confirmado, então sem a variável tudo vai direto para o Selenium
+URL_IMAGEM_DIRETA = os.environ.get("METAPI_URL_IMAGEM_SATELITE") or None
+TIMEOUT_DIRETO = 8
+
+# Mapa de classes de detectar_cores/classificar_cores (uint8 por pixel)
+CLASSE_NENHUMA = 0
+CLASSE_CHUVA = 1       # amarelo
+CLASSE_TEMPESTADE = 2  # vermelho
+
+# Faixas RGB inclusivas (cv2.inRange) equivalentes aos limiares de cor
+FAIXA_VERMELHO = ((181, 0, 0), (255, 89, 89))    # R > 180, G < 90, B < 90
+FAIXA_AMARELO = ((151, 153, 0), (255, 255, 97))  # R > 150, G > 152, B < 98
+
+# Anotação de emitir_alerta: (área mínima da caixa, cor RGB do contorno, emoji)
+ALERTA_TEMPESTADE = (400, (255, 0, 0), ":cloud_with_lightning_and_rain:")
+ALERTA_CHUVA = (500, (255, 255, 0), ":cloud_with_rain:")
+FONTE_EMOJI = "seguiemj.ttf"
+TAMANHO_EMOJI = 35
+ESPESSURA_CONTORNO = 6
+ALERTAS = {CLASSE_TEMPESTADE: ALERTA_TEMPESTADE, CLASSE_CHUVA: ALERTA_CHUVA}
+
+# Células de extrair_celulas: uma linha por componente conexa (máscara dilatada) de cada classe
+DTYPE_CELULA = np.dtype([
+    ("x", np.int32), ("y", np.int32), ("largura", np.int32), ("altura", np.int32),
+    ("area", np.int32),                      # pixels da componente dilatada
+    ("cx", np.float32), ("cy", np.float32),  # centroide
+    ("xt", np.int32),                        # x do primeiro pixel da linha y (ordem de varredura)
+    ("classe", np.uint8),                    # CLASSE_TEMPESTADE / CLASSE_CHUVA
+])
+KERNEL_CELULAS = np.ones((6, 6), np.uint8)
+RAIO_KERNEL = KERNEL_CELULAS.shape[0] // 2  # alcance da dilatação (âncora no centro)
+KERNEL_VIZINHOS_4 = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+TAMANHO_BLOCO = 64  # lado dos blocos comparados por DetectorIncremental
+
+_buffers_cores = threading.local()  # Buffers reaproveitados entre quadros (um conjunto por thread)
 
 def inicio(opcao):
     match opcao:
@@ -33,77 +87,671 @@ def inicio(opcao):
             reg= "SE"
     return reg
 
-def obter_imagem_com_selenium(regiao):
+def criar_driver():
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument('--no-sandbox')
 
     driver = webdriver.Chrome(service=ChromeService(), options=chrome_options)
-    driver.get("https://satelite.inmet.gov.br/")
-    time.sleep(2)
-    WebDriverWait(driver, 15).until(EC.element_to_be_clickable((By.ID, regiao))).click()
-    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.ID, "TN"))).click()
-    time.sleep(2)
-    img = driver.find_element(By.TAG_NAME, 'img')
-    img_src = img.get_attribute('src')
-    driver.quit()
-
-    if img_src.startswith("data:image"):
-        base64_data = img_src.split(",")[1]
-        img_bytes = base64.b64decode(base64_data)
-        img_pil = Image.open(BytesIO(img_bytes)).convert("RGB")
-    else:
+    driver.set_page_load_timeout(30)
+    return driver
+
+class PoolNavegadores:
+    """Sessões de WebDriver mantidas abertas e reaproveitadas entre capturas.
+
+    No máximo `tamanho` navegadores existem ao mesmo tempo; cada um é testado
+    antes do uso e substituído depois de `max_usos` capturas ou de um erro.
+    """
+
+    def __init__(self, tamanho=2, max_usos=50, fabrica=criar_driver):
+        self.tamanho = tamanho
+        self.max_usos = max_usos
+        self.fabrica = fabrica
+        self._livres = queue.LifoQueue()  # (driver, usos); o mais recente está mais "quente"
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._lock = threading.Lock()
+        self._encerrado = False
+        self._criados = 0
+        self._reciclados = 0
+        self._reaproveitados = 0
+
+    @contextmanager
+    def navegador(self):
+        self._vagas.acquire()
+        driver, usos = None, 0
+        try:
+            driver, usos = self._obter()
+            yield driver
+            usos += 1
+        except Exception:
+            # Sessão pode ter ficado em estado inconsistente: não volta ao pool
+            self._descartar(driver)
+            driver = None
+            raise
+        finally:
+            if driver is not None:
+                self._devolver(driver, usos)
+            self._vagas.release()
+
+    def _obter(self):
+        while True:
+            try:
+                driver, usos = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if self._saudavel(driver):
+                with self._lock:
+                    self._reaproveitados += 1
+                return driver, usos
+            self._descartar(driver)
+
+        driver = self.fabrica()
+        with self._lock:
+            self._criados += 1
+        return driver, 0
+
+    def _devolver(self, driver, usos):
+        if self._encerrado or usos >= self.max_usos:
+            with self._lock:
+                self._reciclados += 1
+            self._descartar(driver)
+        else:
+            self._livres.put((driver, usos))
+
+    @staticmethod
+    def _saudavel(driver):
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _descartar(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "tamanho": self.tamanho,
+                "livres": self._livres.qsize(),
+                "criados": self._criados,
+                "reaproveitados": self._reaproveitados,
+                "reciclados": self._reciclados
+            }
+
+    def encerrar(self):
+        self._encerrado = True
+        while True:
+            try:
+                driver, _ = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            self._descartar(driver)
+
+_pool_navegadores = None
+_lock_pool = threading.Lock()
+
+def get_pool_navegadores():
+    global _pool_navegadores
+    with _lock_pool:
+        if _pool_navegadores is None:
+            _pool_navegadores = PoolNavegadores()
+            atexit.register(_pool_navegadores.encerrar)
+        return _pool_navegadores
+
+def _src_imagem(driver):
+    # src da primeira <img>, se já estiver em base64
+    for img in driver.find_elements(By.TAG_NAME, 'img')[:1]:
+        src = img.get_attribute('src') or ""
+        if src.startswith("data:image"):
+            return src
+    return False
+
+# Tamanho e final do src da primeira <img> já carregada em base64: identifica a imagem sem
+# trazer o data URI inteiro (vários MB) pelo WebDriver a cada verificação
+_JS_ASSINATURA_IMAGEM = """
+const img = document.getElementsByTagName('img')[0];
+if (!img || !img.complete || !img.naturalWidth || !img.src.startsWith('data:image')) return null;
+return img.src.length + ':' + img.src.slice(-64);
+"""
+
+def _assinatura_imagem(driver):
+    return driver.execute_script(_JS_ASSINATURA_IMAGEM)
+
+def _abrir_pagina(driver, timeout=TIMEOUT_ESPERA):
+    driver.get(URL_SATELITE)
+    return WebDriverWait(driver, timeout)
+
+def _aguardar_imagem_nova(driver, antes, timeout=TIMEOUT_TROCA_IMAGEM, intervalo=TEMPO_IMAGEM_ESTAVEL):
+    # Assinatura da imagem assim que uma diferente de `antes` termina de carregar; se ela não
+    # trocar, a atual depois de `intervalo` segundos parada (ou a última vista no timeout)
+    vista = {"assinatura": None, "desde": time.monotonic()}
+
+    def carregada(d):
+        assinatura = _assinatura_imagem(d)
+        if assinatura != vista["assinatura"]:
+            vista.update(assinatura=assinatura, desde=time.monotonic())
+        if assinatura is None:
+            return False
+        return assinatura != antes or time.monotonic() - vista["desde"] >= intervalo
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=INTERVALO_VERIFICACAO).until(carregada)
+    except TimeoutException:
+        pass
+    return vista["assinatura"]
+
+def _capturar_regiao(driver, espera, regiao):
+    antes = _assinatura_imagem(driver)
+    espera.until(EC.element_to_be_clickable((By.ID, regiao))).click()
+    botao_tn = espera.until(EC.element_to_be_clickable((By.ID, "TN")))
+    # O src é um data URI (não diz o produto): a imagem padrão da região precisa
+    # terminar de carregar antes, senão a troca esperada abaixo seria ela e não a TN
+    anterior = _aguardar_imagem_nova(driver, antes)
+    botao_tn.click()
+
+    # Espera a imagem trocar depois do clique; se não trocar (TN já ativo), usa a atual
+    try:
+        WebDriverWait(driver, TIMEOUT_TROCA_IMAGEM, poll_frequency=INTERVALO_VERIFICACAO).until(
+            lambda d: _assinatura_imagem(d) not in (None, anterior))
+    except TimeoutException:
+        if not anterior:
+            raise
+    src = _src_imagem(driver)  # data URI inteiro, uma vez só
+    if not src:
+        raise TimeoutException("Imagem de satélite não carregou")
+    return src
+
+def capturar_src(driver, regiao, timeout=TIMEOUT_ESPERA):
+    return _capturar_regiao(driver, _abrir_pagina(driver, timeout), regiao)
+
+def _imagem_de_src(img_src):
+    if not img_src.startswith("data:image"):
         raise ValueError("A imagem não está em base64. Verifique a URL.")
+    return _imagem_de_bytes(_bytes_de_data_uri(img_src))
+
+def obter_imagem_com_selenium(regiao, pool=None):
+    pool = pool or get_pool_navegadores()
+    with pool.navegador() as driver:
+        img_src = capturar_src(driver, regiao)
+    return _imagem_de_src(img_src)
+
+def capturar_regioes_com_selenium(regioes, pool=None, timeout=TIMEOUT_ESPERA):
+    # Abre a página uma vez e clica em cada região; gera (regiao, imagem ou exceção)
+    if not regioes:
+        return
+    pool = pool or get_pool_navegadores()
+    with pool.navegador() as driver:
+        espera = _abrir_pagina(driver, timeout)
+        for regiao in regioes:
+            try:
+                resultado = _imagem_de_src(_capturar_regiao(driver, espera, regiao))
+            except Exception as e:
+                resultado = e
+                espera = _abrir_pagina(driver, timeout)  # Recomeça da página limpa para a próxima
+            yield regiao, resultado
+
+def _imagem_de_bytes(img_bytes):
+    return Image.open(BytesIO(img_bytes)).convert("RGB")
+
+def _bytes_de_data_uri(texto):
+    return base64.b64decode(texto.split(",", 1)[1])
+
+def _procurar_base64(dados):
+    # Primeiro texto em base64 (data URI ou campo de imagem) em qualquer nível do JSON
+    if isinstance(dados, str):
+        if dados.startswith("data:image"):
+            return _bytes_de_data_uri(dados)
+        return None
+    if isinstance(dados, dict):
+        for chave in ("base64", "imagem", "image", "img"):
+            valor = dados.get(chave)
+            if isinstance(valor, str) and valor:
+                return _bytes_de_data_uri(valor) if valor.startswith("data:") else base64.b64decode(valor)
+        dados = list(dados.values())
+    if isinstance(dados, list):
+        for item in dados:
+            img_bytes = _procurar_base64(item)
+            if img_bytes:
+                return img_bytes
+    return None
+
+def _bytes_da_resposta(response):
+    # Aceita a imagem crua, um data URI em texto ou JSON com a imagem em base64
+    tipo = response.headers.get("Content-Type", "")
+    if tipo.startswith("image/"):
+        return response.content
+
+    texto = response.text.strip()
+    if texto.startswith("data:image"):
+        return _bytes_de_data_uri(texto)
+
+    img_bytes = _procurar_base64(json.loads(texto))
+    if not img_bytes:
+        raise ValueError("Resposta sem imagem")
+    return img_bytes
+
+_sessao_direta = None
+_lock_sessao_direta = threading.Lock()
+
+def _get_sessao_direta():
+    # Sessão sem retry: uma falha do caminho direto cai logo para o navegador
+    global _sessao_direta
+    with _lock_sessao_direta:
+        if _sessao_direta is None:
+            _sessao_direta = SessaoHTTP(tentativas=0)
+        return _sessao_direta
+
+def obter_imagem_direta(regiao, produto="TN", url=None, sessao=None, timeout=TIMEOUT_DIRETO):
+    url = url or URL_IMAGEM_DIRETA
+    if not url:
+        raise ValueError("Busca direta desativada (defina METAPI_URL_IMAGEM_SATELITE)")
+    sessao = sessao or _get_sessao_direta()
+    url = url.format(regiao=regiao, produto=produto, data=datetime.now(timezone.utc).strftime("%Y-%m-%d"))
 
-    return img_pil
+    response = sessao.get(url, timeout=timeout)
+    if response.status_code != 200:
+        raise ValueError(f"HTTP {response.status_code} em {url}")
+    return _imagem_de_bytes(_bytes_da_resposta(response))
+
+def obter_imagens(regioes, pool=None, url=None):
+    # Gera (regiao, imagem ou exceção) conforme cada imagem fica pronta.
+    # Tenta o caminho direto (se configurado); depois da primeira falha, o
+    # restante vai todo para uma única sessão do navegador.
+    url = url or URL_IMAGEM_DIRETA
+    pendentes = []
+    for regiao in regioes:
+        if pendentes or not url:
+            pendentes.append(regiao)
+            continue
+        try:
+            yield regiao, obter_imagem_direta(regiao, url=url)
+        except Exception as e:
+            print(f"⚠️ Busca direta da imagem falhou ({e}); usando navegador")
+            pendentes.append(regiao)
+
+    if not pendentes:
+        return  # Tudo veio pelo caminho direto: nem abre o navegador
+    restantes = list(pendentes)
+    try:
+        for regiao, resultado in capturar_regioes_com_selenium(pendentes, pool):
+            restantes.remove(regiao)
+            yield regiao, resultado
+    except Exception as e:
+        for regiao in restantes:
+            yield regiao, e
+
+def obter_imagem(regiao, pool=None, url=None):
+    # Caminho direto (sem navegador), se configurado; o Selenium fica como alternativa
+    url = url or URL_IMAGEM_DIRETA
+    if not url:
+        return obter_imagem_com_selenium(regiao, pool)
+    try:
+        return obter_imagem_direta(regiao, url=url)
+    except Exception as e:
+        print(f"⚠️ Busca direta da imagem falhou ({e}); usando navegador")
+        return obter_imagem_com_selenium(regiao, pool)
+
+def hash_quadro(imagem):
+    # Hash do conteúdo bruto (forma + pixels), sem copiar a imagem se já for contígua
+    img_np = np.ascontiguousarray(imagem)
+    h = hashlib.blake2b(str(img_np.shape).encode(), digest_size=16)
+    h.update(img_np.data)
+    return h.hexdigest()
+
+def dhash_quadro(imagem, lado=16):
+    # Hash perceptual (dHash) de lado*lado bits: compara vizinhos da imagem reduzida em tons de cinza
+    img_np = np.asarray(imagem)
+    cinza = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY) if img_np.ndim == 3 else img_np
+    reduzida = cv2.resize(cinza, (lado + 1, lado), interpolation=cv2.INTER_AREA)
+    bits = reduzida[:, 1:] > reduzida[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def _buffer_cores(nome, forma):
+    buffer = getattr(_buffers_cores, nome, None)
+    if buffer is None or buffer.shape != forma:
+        buffer = np.empty(forma, np.uint8)
+        setattr(_buffers_cores, nome, buffer)
+    return buffer
+
+def classificar_cores(imagem, saida=None):
+    # Mapa uint8 (altura, largura): CLASSE_NENHUMA / CLASSE_CHUVA / CLASSE_TEMPESTADE.
+    # Vermelho e amarelo não se sobrepõem (G < 90 x G > 152).
+    img_np = np.asarray(imagem)
+    forma = img_np.shape[:2]
+    if saida is None:
+        saida = np.empty(forma, np.uint8)
+    vermelho = _buffer_cores("vermelho", forma)
+
+    cv2.inRange(img_np, *FAIXA_AMARELO, dst=saida)
+    cv2.inRange(img_np, *FAIXA_VERMELHO, dst=vermelho)
+    cv2.bitwise_and(saida, (CLASSE_CHUVA,), dst=saida)
+    cv2.bitwise_and(vermelho, (CLASSE_TEMPESTADE,), dst=vermelho)
+    cv2.bitwise_or(saida, vermelho, dst=saida)
+    return saida
 
 def detectar_cores(imagem):
-    img_np = np.array(imagem)
-    mascara_vermelho = (
-        (img_np[:, :, 0] > 180) &
-        (img_np[:, :, 1] < 90) &
-        (img_np[:, :, 2] < 90)
-    )
-    mascara_amarelo = (
-        (img_np[:, :, 0] > 150) &
-        (img_np[:, :, 1] > 152) &
-        (img_np[:, :, 2] < 98)
-    )
-    return mascara_vermelho, mascara_amarelo
-
-def emitir_alerta(imagem, mascara_vermelho, mascara_amarelo):
-    img_bgr = cv2.cvtColor(np.array(imagem), cv2.COLOR_RGB2BGR)
-    img_pil = Image.fromarray(cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB))
-    kernel = np.ones((6, 6), np.uint8)
-
-    if mascara_vermelho.any():
-        mascara_uint8 = (mascara_vermelho.astype(np.uint8)) * 255
-        mascara_dilatadaV = cv2.dilate(mascara_uint8, kernel, iterations=1)
-        contornos, _ = cv2.findContours(mascara_dilatadaV, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contorno in contornos:
-            x, y, w, h = cv2.boundingRect(contorno)
-            if w * h < 400:
-                continue
-            ImageDraw.Draw(img_pil).rectangle([(x, y), (x + w, y + h)], outline=(255, 0, 0), width=6)
-            cx = x + w / 2 - 16
-            cy = y + h / 2 - 16
-            ImageDraw.Draw(img_pil).text((cx, cy), emoji.emojize(":cloud_with_lightning_and_rain:"),
-                                         font=ImageFont.truetype("seguiemj.ttf", 35), fill=(255, 255, 255))
-
-    elif not mascara_vermelho.any() and mascara_amarelo.any():
-        mascara_uint8 = (mascara_amarelo.astype(np.uint8)) * 255
-        mascara_dilatadaA = cv2.dilate(mascara_uint8, kernel, iterations=1)
-        contornos, _ = cv2.findContours(mascara_dilatadaA, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contorno in contornos:
-            x, y, w, h = cv2.boundingRect(contorno)
-            if w * h < 500:
-                continue
-            ImageDraw.Draw(img_pil).rectangle([(x, y), (x + w, y + h)], outline=(255, 255, 0), width=6)
-            cx = x + w / 2 - 16
-            cy = y + h / 2 - 16
-            ImageDraw.Draw(img_pil).text((cx, cy), emoji.emojize(":cloud_with_rain:"),
-                                         font=ImageFont.truetype("seguiemj.ttf", 35), fill=(255, 255, 255))
-
-    img_bgr_final = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-    return img_bgr_final
\ No newline at end of file
+    img_np = np.asarray(imagem)
+    classes = classificar_cores(img_np, _buffer_cores("classes", img_np.shape[:2]))
+    return classes == CLASSE_TEMPESTADE, classes == CLASSE_CHUVA
+
+def _mascara_uint8(mascara):
+    # Máscara booleana vista como uint8 0/1, sem cópia (dilate/findContours só olham != 0)
+    return mascara.view(np.uint8) if mascara.dtype == bool else mascara
+
+@lru_cache(maxsize=None)
+def _fonte(nome, tamanho):
+    # Carregada uma vez por processo; sem o arquivo (ex.: fora do Windows) usa a fonte embutida do Pillow
+    try:
+        return ImageFont.truetype(nome, tamanho)
+    except OSError:
+        print(f"⚠️ Fonte {nome} não encontrada; usando a fonte padrão")
+        try:
+            return ImageFont.load_default(tamanho)
+        except TypeError:  # Pillow < 10.1
+            return ImageFont.load_default()
+
+@lru_cache(maxsize=None)
+def _glifo(texto, fracao=(0.0, 0.0), nome_fonte=FONTE_EMOJI, tamanho=TAMANHO_EMOJI):
+    # Texto rasterizado uma vez por fração de pixel (ImageDraw.text posiciona com subpixel):
+    # (alfa float32 (h, w, 1), deslocamento x, y a partir da posição inteira do texto)
+    fonte = _fonte(nome_fonte, tamanho)
+    esquerda, topo, direita, base = fonte.getbbox(texto)
+    if direita <= esquerda or base <= topo:
+        return None
+    esquerda, topo = max(esquerda, 0), max(topo, 0)
+    mascara = Image.new("L", (direita + 1, base + 1), 0)
+    ImageDraw.Draw(mascara).text(fracao, texto, font=fonte, fill=255)
+    alfa = np.asarray(mascara, np.float32)[topo:, esquerda:, None] / 255
+    return alfa, esquerda, topo
+
+def _desenhar_contorno(img, x, y, w, h, cor, espessura=ESPESSURA_CONTORNO):
+    # Mesmos pixels de ImageDraw.rectangle([(x, y), (x + w, y + h)], width=espessura): faixas internas
+    e = espessura - 1
+    cv2.rectangle(img, (x, y), (x + w, y + e), cor, -1)
+    cv2.rectangle(img, (x, y + h - e), (x + w, y + h), cor, -1)
+    cv2.rectangle(img, (x, y), (x + e, y + h), cor, -1)
+    cv2.rectangle(img, (x + w - e, y), (x + w, y + h), cor, -1)
+
+def _colar_texto(img, texto, x, y, cor=(255, 255, 255)):
+    # Mistura o glifo em cache na imagem em (x, y), recortando nas bordas
+    x_inteiro, y_inteiro = int(x), int(y)
+    glifo = _glifo(texto, (x - x_inteiro, y - y_inteiro))
+    if glifo is None:
+        return
+    alfa, dx, dy = glifo
+    x, y = x_inteiro + dx, y_inteiro + dy
+    altura, largura = alfa.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + largura, img.shape[1]), min(y + altura, img.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    a = alfa[y0 - y:y1 - y, x0 - x:x1 - x]
+    regiao = img[y0:y1, x0:x1]
+    regiao[:] = regiao + (np.float32(cor) - regiao) * a + 0.5
+
+def _componentes(mascara):
+    # Rótulos uint16 (metade da memória do int32); com mais de 65535 componentes o OpenCV acusa estouro
+    try:
+        return cv2.connectedComponentsWithStats(mascara, connectivity=8, ltype=cv2.CV_16U)
+    except cv2.error:
+        return cv2.connectedComponentsWithStats(mascara, connectivity=8, ltype=cv2.CV_32S)
+
+def _rotulos_externos(mascara, rotulos, stats):
+    # Como o RETR_EXTERNAL: só as componentes que tocam o fundo de fora (4-conexo a partir da
+    # borda); as que estão no buraco de outra ficam de fora. Sem buracos, são todas
+    rotulos_celulas = np.arange(1, len(stats))
+    fundo = cv2.copyMakeBorder(mascara, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    preenchidos = cv2.floodFill(fundo, None, (0, 0), 2, flags=4)[0]
+    if preenchidos == fundo.size - int(stats[1:, cv2.CC_STAT_AREA].sum()):
+        return rotulos_celulas
+    externas = np.zeros(len(stats), bool)
+    externas[rotulos[cv2.dilate((fundo == 2).view(np.uint8), KERNEL_VIZINHOS_4)[1:-1, 1:-1] > 0]] = True
+    return rotulos_celulas[externas[1:]]
+
+def _x_topo(rotulos, stats, rotulos_celulas):
+    # x do primeiro pixel de cada componente na sua linha de cima (onde a varredura a encontra):
+    # lê só o trecho dessa linha dentro da caixa de cada uma, todos de uma vez
+    topos, esquerdas, larguras = (stats[:, campo] for campo in
+                                  (cv2.CC_STAT_TOP, cv2.CC_STAT_LEFT, cv2.CC_STAT_WIDTH))
+    inicios = np.cumsum(larguras) - larguras
+    deslocamentos = np.arange(int(larguras.sum())) - np.repeat(inicios, larguras)
+    valores = rotulos[np.repeat(topos, larguras), np.repeat(esquerdas, larguras) + deslocamentos]
+    proprios = valores == np.repeat(rotulos_celulas, larguras)
+    return np.minimum.reduceat(np.where(proprios, deslocamentos, larguras.max()), inicios) + esquerdas
+
+def _celulas_da_dilatada(mascara_dilatada, classe, x0=0, y0=0):
+    # Componentes 8-conexas da máscara já dilatada, sem as que estão dentro do buraco de outra
+    # (mesmo agrupamento de findContours + RETR_EXTERNAL), rotuladas só no retângulo que contém
+    # pixels da classe; (x0, y0) é a origem da máscara no quadro
+    bx, by, largura, altura = cv2.boundingRect(mascara_dilatada)
+    if largura == 0:
+        return np.empty(0, DTYPE_CELULA)
+    recorte = mascara_dilatada[by:by + altura, bx:bx + largura]
+    _, rotulos, stats, centroides = _componentes(recorte)
+    externos = _rotulos_externos(recorte, rotulos, stats)  # rótulo 0 é o fundo
+    stats, centroides = stats[externos], centroides[externos]
+    x0, y0 = x0 + bx, y0 + by
+    celulas = np.empty(len(externos), DTYPE_CELULA)
+    celulas["xt"] = _x_topo(rotulos, stats, externos) + x0
+    celulas["x"] = stats[:, cv2.CC_STAT_LEFT] + x0
+    celulas["y"] = stats[:, cv2.CC_STAT_TOP] + y0
+    celulas["largura"] = stats[:, cv2.CC_STAT_WIDTH]
+    celulas["altura"] = stats[:, cv2.CC_STAT_HEIGHT]
+    celulas["area"] = stats[:, cv2.CC_STAT_AREA]
+    celulas["cx"] = centroides[:, 0] + x0
+    celulas["cy"] = centroides[:, 1] + y0
+    celulas["classe"] = classe
+    return celulas
+
+def _celulas_da_mascara(mascara, classe):
+    mascara_dilatada = cv2.dilate(_mascara_uint8(mascara), KERNEL_CELULAS, iterations=1)
+    return _celulas_da_dilatada(mascara_dilatada, classe)
+
+def extrair_celulas(mascara_vermelho, mascara_amarelo):
+    # Todas as células das duas classes em um único array estruturado (DTYPE_CELULA)
+    return np.concatenate([
+        _celulas_da_mascara(mascara_vermelho, CLASSE_TEMPESTADE),
+        _celulas_da_mascara(mascara_amarelo, CLASSE_CHUVA),
+    ])
+
+def filtrar_celulas(celulas, classe, area_minima=0):
+    # Células da classe cuja caixa tem área >= area_minima (seleção por máscara, sem laço)
+    area_caixa = celulas["largura"].astype(np.int64) * celulas["altura"]
+    return celulas[(celulas["classe"] == classe) & (area_caixa >= area_minima)]
+
+def tem_celulas(celulas, classe):
+    return bool((celulas["classe"] == classe).any())
+
+def desenhar_alertas(img_bgr, celulas, cor_rgb, nome_emoji):
+    # Anota as células direto no ndarray BGR: contorno e depois o glifo em cache, célula a
+    # célula, na ordem do findContours usado antes (inversa da varredura, qualquer que seja a
+    # ordem do array): onde o glifo de uma célula cruza a caixa de outra, o resultado é o mesmo
+    cor = cor_rgb[::-1]
+    texto = emoji.emojize(nome_emoji)
+    celulas = celulas[np.lexsort((celulas["xt"], celulas["y"]))[::-1]]
+    caixas = zip(*(celulas[campo].tolist() for campo in ("x", "y", "largura", "altura")))
+    for x, y, w, h in caixas:
+        _desenhar_contorno(img_bgr, x, y, w, h, cor)
+        _colar_texto(img_bgr, texto, x + w / 2 - 16, y + h / 2 - 16)
+    return img_bgr
+
+def emitir_alerta(imagem, mascara_vermelho, mascara_amarelo, celulas=None, saida=None):
+    # Única conversão para BGR, já contígua (vai direto para a textura); as anotações são feitas nela.
+    # Com celulas, as máscaras não são usadas; saida recebe a imagem (ex.: memória compartilhada)
+    img_bgr = cv2.cvtColor(np.asarray(imagem), cv2.COLOR_RGB2BGR, dst=saida)
+    if celulas is None:
+        celulas = extrair_celulas(mascara_vermelho, mascara_amarelo)
+
+    # Tempestades têm prioridade: a chuva só é anotada se não houver nenhuma célula vermelha
+    classe = CLASSE_TEMPESTADE if tem_celulas(celulas, CLASSE_TEMPESTADE) else CLASSE_CHUVA
+    area_minima, cor, nome_emoji = ALERTAS[classe]
+    desenhar_alertas(img_bgr, filtrar_celulas(celulas, classe, area_minima), cor, nome_emoji)
+    return img_bgr
+
+class DetectorIncremental:
+    """Detecção de uma região reaproveitando o quadro anterior.
+
+    O quadro novo é comparado com o anterior em blocos de `lado_bloco` pixels.
+    Classificação e dilatação são refeitas só nos blocos alterados (mais uma
+    margem do tamanho do kernel), e as células que tocam essas áreas são
+    rerotuladas e mescladas com as demais. Se a área a refazer passar de
+    `fracao_maxima` do quadro, faz a detecção completa.
+    """
+
+    def __init__(self, lado_bloco=TAMANHO_BLOCO, fracao_maxima=0.5):
+        self.lado_bloco = lado_bloco
+        self.fracao_maxima = fracao_maxima
+        self._anterior = None
+        self._classes = None
+        self._dilatadas = {}  # classe -> máscara dilatada uint8
+        self._celulas = None
+        self._quadros = 0
+        self._completos = 0
+        self._blocos = 0
+        self._blocos_refeitos = 0
+        self._lock = threading.Lock()  # quadros da mesma região chegam do agendador e da UI
+
+    def detectar(self, imagem):
+        # Retorna (mapa de classes, células); o array de células não é mais alterado, o mapa de
+        # classes é do detector e muda no próximo quadro
+        with self._lock:
+            return self._detectar(np.asarray(imagem))
+
+    def _detectar(self, img_np):
+        self._quadros += 1
+        if self._anterior is None or self._anterior.shape != img_np.shape:
+            return self._detectar_completo(img_np)
+
+        alterados = self._blocos_alterados(img_np)
+        self._blocos += alterados.size
+        if not alterados.any():
+            return self._classes, self._celulas
+
+        retangulos = self._retangulos(alterados, img_np.shape[:2])
+        recortes = self._recortes_celulas([self._com_margem(r, RAIO_KERNEL) for r in retangulos])
+        altura, largura = img_np.shape[:2]
+        if sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in recortes) > self.fracao_maxima * altura * largura:
+            self._blocos_refeitos += alterados.size
+            return self._detectar_completo(img_np)
+
+        self._blocos_refeitos += int(alterados.sum())
+        for x0, y0, x1, y1 in retangulos:
+            self._classes[y0:y1, x0:x1] = classificar_cores(img_np[y0:y1, x0:x1])
+            self._anterior[y0:y1, x0:x1] = img_np[y0:y1, x0:x1]
+        for retangulo in retangulos:
+            self._dilatar(retangulo)
+        self._celulas = self._mesclar_celulas(recortes)
+        return self._classes, self._celulas
+
+    def _detectar_completo(self, img_np):
+        self._completos += 1
+        self._anterior = img_np.copy()
+        self._classes = classificar_cores(img_np)
+        self._dilatadas = {
+            classe: cv2.dilate((self._classes == classe).view(np.uint8), KERNEL_CELULAS, iterations=1)
+            for classe in (CLASSE_TEMPESTADE, CLASSE_CHUVA)
+        }
+        self._celulas = np.concatenate([_celulas_da_dilatada(mascara, classe)
+                                        for classe, mascara in self._dilatadas.items()])
+        return self._classes, self._celulas
+
+    def _blocos_alterados(self, img_np):
+        # Matriz bool (blocos_y, blocos_x): máximo da diferença por faixa de linhas, depois por bloco
+        altura, largura = img_np.shape[:2]
+        lado = self.lado_bloco
+        diferenca = cv2.absdiff(self._anterior, img_np).reshape(altura, -1)
+        faixas = np.vstack([diferenca[y:y + lado].max(axis=0) for y in range(0, altura, lado)])
+        passo = diferenca.shape[1] // largura * lado
+        return np.maximum.reduceat(faixas, np.arange(0, faixas.shape[1], passo), axis=1) > 0
+
+    def _retangulos(self, alterados, forma):
+        # Grupos 8-conexos de blocos alterados -> retângulos (x0, y0, x1, y1) em pixels
+        _, _, stats, _ = cv2.connectedComponentsWithStats(alterados.view(np.uint8), connectivity=8)
+        lado = self.lado_bloco
+        altura, largura = forma
+        return [(bx * lado, by * lado, min((bx + bw) * lado, largura), min((by + bh) * lado, altura))
+                for bx, by, bw, bh, _ in stats[1:].tolist()]
+
+    def _com_margem(self, retangulo, margem):
+        x0, y0, x1, y1 = retangulo
+        altura, largura = self._classes.shape
+        return max(x0 - margem, 0), max(y0 - margem, 0), min(x1 + margem, largura), min(y1 + margem, altura)
+
+    def _dilatar(self, retangulo):
+        # A dilatação muda até RAIO_KERNEL pixels fora do retângulo e lê outros RAIO_KERNEL além disso
+        x0, y0, x1, y1 = self._com_margem(retangulo, RAIO_KERNEL)
+        ex0, ey0, ex1, ey1 = self._com_margem((x0, y0, x1, y1), RAIO_KERNEL)
+        for classe, dilatada in self._dilatadas.items():
+            mascara = (self._classes[ey0:ey1, ex0:ex1] == classe).view(np.uint8)
+            resultado = cv2.dilate(mascara, KERNEL_CELULAS, iterations=1)
+            dilatada[y0:y1, x0:x1] = resultado[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+
+    def _recortes_celulas(self, recortes):
+        # Cresce os recortes até conterem inteiras as células antigas que tocam neles (ou em outro
+        # recorte sobreposto); assim nenhuma componente nova atravessa a borda de um recorte
+        celulas = self._celulas
+        recortes = [list(r) for r in recortes]
+        mudou = True
+        while mudou:
+            mudou = False
+            recortes = _unir_sobrepostos(recortes)
+            for recorte in recortes:
+                tocadas = celulas[_celulas_tocam(celulas, self._com_margem(recorte, 1))]
+                if not len(tocadas):
+                    continue
+                novo = [min(recorte[0], int(tocadas["x"].min())), min(recorte[1], int(tocadas["y"].min())),
+                        max(recorte[2], int((tocadas["x"] + tocadas["largura"]).max())),
+                        max(recorte[3], int((tocadas["y"] + tocadas["altura"]).max()))]
+                if novo != recorte:
+                    recorte[:] = novo
+                    mudou = True
+        return [tuple(r) for r in recortes]
+
+    def _mesclar_celulas(self, recortes):
+        celulas = self._celulas
+        mantidas = np.ones(len(celulas), bool)
+        novas = []
+        for recorte in recortes:
+            mantidas &= ~_celulas_tocam(celulas, recorte)
+            x0, y0, x1, y1 = recorte
+            for classe, dilatada in self._dilatadas.items():
+                novas.append(_celulas_da_dilatada(dilatada[y0:y1, x0:x1], classe, x0, y0))
+        return np.concatenate([celulas[mantidas], *novas])
+
+    def estatisticas(self):
+        return {
+            "quadros": self._quadros,
+            "completos": self._completos,
+            "fracao_blocos_refeitos": self._blocos_refeitos / self._blocos if self._blocos else 0.0
+        }
+
+def _celulas_tocam(celulas, retangulo):
+    x0, y0, x1, y1 = retangulo
+    return ((celulas["x"] < x1) & (celulas["x"] + celulas["largura"] > x0)
+            & (celulas["y"] < y1) & (celulas["y"] + celulas["altura"] > y0))
+
+def _unir_sobrepostos(retangulos):
+    # Junta retângulos [x0, y0, x1, y1] que se sobrepõem até nenhum par se sobrepor
+    retangulos = [list(r) for r in retangulos]
+    unidos = True
+    while unidos:
+        unidos = False
+        for i in range(len(retangulos)):
+            for j in range(i + 1, len(retangulos)):
+                a, b = retangulos[i], retangulos[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    retangulos[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del retangulos[j]
+                    unidos = True
+                    break
+            if unidos:
+                break
+    return retangulos
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+tarefas_utils.py - Pool de threads limitado com deduplicação de tarefas em andamento
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ExecutorTarefas:
+    """ThreadPoolExecutor com limite de workers que ignora tarefas já em andamento.
+    
+    Cada tarefa é identificada por uma ou mais chaves (ex.: ("satelite", "ams")).
+    Enquanto uma chave está na fila ou executando, novos envios com ela são
+    descartados, então uma atualização lenta nunca é disparada duas vezes.
+    """
+    
+    def __init__(self, nome, max_workers):
+        self.nome = nome
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=nome)
+        self._lock = threading.Lock()
+        self._em_andamento = set()
+        self._na_fila = 0
+        self._executando = 0
+        self._concluidas = 0
+        self._falhas = 0
+        self._duplicadas = 0
+    
+    def submeter(self, chave, funcao, *args):
+        """Envia funcao(*args) se a chave não estiver em andamento; retorna o Future ou None"""
+        return self.submeter_lote([chave], lambda _: funcao(*args))
+    
+    def submeter_lote(self, chaves, funcao):
+        """Envia funcao(chaves_livres) só com as chaves que não estão em andamento.
+        
+        Retorna o Future, ou None se todas já estavam em andamento.
+        """
+        with self._lock:
+            livres = []
+            for chave in chaves:
+                if chave in self._em_andamento:
+                    self._duplicadas += 1
+                else:
+                    self._em_andamento.add(chave)
+                    livres.append(chave)
+            if not livres:
+                return None
+            self._na_fila += 1
+        
+        try:
+            return self._executor.submit(self._executar, livres, funcao)
+        except RuntimeError:
+            # Executor encerrado: libera as chaves reservadas
+            self._finalizar(livres, iniciou=False, sucesso=False)
+            return None
+    
+    def em_andamento(self, chave):
+        """Indica se a chave está na fila ou executando"""
+        with self._lock:
+            return chave in self._em_andamento
+    
+    def _executar(self, chaves, funcao):
+        with self._lock:
+            self._na_fila -= 1
+            self._executando += 1
+        
+        sucesso = False
+        try:
+            resultado = funcao(chaves)
+            sucesso = resultado is not False
+            return resultado
+        except Exception as e:
+            print(f"❌ Erro na tarefa {self.nome}: {e}")
+        finally:
+            self._finalizar(chaves, iniciou=True, sucesso=sucesso)
+    
+    def _finalizar(self, chaves, iniciou, sucesso):
+        with self._lock:
+            if iniciou:
+                self._executando -= 1
+            else:
+                self._na_fila -= 1
+            self._em_andamento.difference_update(chaves)
+            if sucesso:
+                self._concluidas += 1
+            else:
+                self._falhas += 1
+    
+    def estatisticas(self):
+        """Profundidade da fila, tarefas executando e contadores acumulados"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "na_fila": self._na_fila,
+                "executando": self._executando,
+                "chaves_em_andamento": len(self._em_andamento),
+                "concluidas": self._concluidas,
+                "falhas": self._falhas,
+                "duplicadas_ignoradas": self._duplicadas
+            }
+    
+    def encerrar(self, esperar=False):
+        """Encerra o pool; novos envios passam a ser descartados"""
+        self._executor.shutdown(wait=esperar)
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+test_metapi_async.py - Testes do MotorMetarAsync contra um servidor HTTP local
+
+O servidor de teste responde /metar e /taf (?ids=A,B) com textos fixos;
+algumas estações simulam erro HTTP e lentidão.
+    
+    python -m unittest test_metapi_async
+"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from metapi import MetarInterpreter, TAFInterpreter
+from metapi_async import MotorMetarAsync
+
+METARS = {
+    "SBGR": "METAR SBGR 181200Z 09010KT 9999 FEW020 25/18 Q1015",
+    "SBBR": "METAR SBBR 181200Z 36005KT CAVOK 27/12 Q1018",
+    "SBLN": "METAR SBLN 181200Z 18003KT 9999 SCT030 24/20 Q1016",
+}
+TAFS = {
+    "SBGR": "TAF SBGR 181100Z 1812/1918 09010KT 9999 SCT020\nTEMPO 1815/1818 3000 TSRA BKN030CB",
+    "SBBR": "TAF SBBR 181100Z 1812/1918 36005KT CAVOK",
+    "SBLN": "TAF SBLN 181100Z 1812/1918 18003KT 9999 SCT030",
+}
+ESTACAO_COM_ERRO = "SBER"  # responde 500
+ESTACAO_LENTA = "SBLN"     # responde depois de ATRASO_LENTA segundos
+ATRASO_LENTA = 2.0
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        ids = parse_qs(partes.query).get("ids", [""])[0].split(",")
+        self.server.requisicoes.append((partes.path, ids))
+        
+        if ESTACAO_COM_ERRO in ids:
+            self.send_error(500)
+            return
+        if ESTACAO_LENTA in ids:
+            self.server.liberar.wait(ATRASO_LENTA)
+        
+        textos = METARS if partes.path == "/metar" else TAFS
+        corpo = "\n".join(textos[icao] for icao in ids if icao in textos).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, *args):
+        pass
+
+class TestMotorMetarAsync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.servidor.daemon_threads = True
+        cls.servidor.requisicoes = []
+        cls.servidor.liberar = threading.Event()
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.servidor.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.liberar.set()
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+    
+    def setUp(self):
+        self.servidor.requisicoes.clear()
+        self.motores = []
+    
+    def tearDown(self):
+        for motor in self.motores:
+            motor.encerrar()
+    
+    def _motor(self, **kwargs):
+        motor = MotorMetarAsync(MetarInterpreter(), TAFInterpreter(),
+                                url_metar=self.url + "/metar", url_taf=self.url + "/taf", **kwargs)
+        self.motores.append(motor)
+        return motor
+    
+    def test_lote_em_uma_requisicao_por_produto(self):
+        resultados_metar, resultados_taf = self._motor().obter_lote(["sbgr", "SBBR"])
+        
+        for icao in ("SBGR", "SBBR"):
+            self.assertTrue(resultados_metar[icao]["sucesso"])
+            self.assertEqual(resultados_metar[icao]["metar"], METARS[icao])
+            self.assertEqual(resultados_metar[icao]["interpretacao_metar"]["aerodromo"], icao)
+            self.assertTrue(resultados_taf[icao]["sucesso"])
+            self.assertEqual(resultados_taf[icao]["interpretacao"]["aerodromo"], icao)
+        self.assertEqual(sorted(self.servidor.requisicoes),
+                         [("/metar", ["SBGR", "SBBR"]), ("/taf", ["SBGR", "SBBR"])])
+    
+    def test_erro_afeta_so_a_estacao(self):
+        resultados_metar, resultados_taf = self._motor(estacoes_por_requisicao=1).obter_lote(
+            ["SBGR", ESTACAO_COM_ERRO])
+        
+        self.assertTrue(resultados_metar["SBGR"]["sucesso"])
+        self.assertTrue(resultados_taf["SBGR"]["sucesso"])
+        self.assertFalse(resultados_metar[ESTACAO_COM_ERRO]["sucesso"])
+        self.assertFalse(resultados_taf[ESTACAO_COM_ERRO]["sucesso"])
+    
+    def test_timeout(self):
+        inicio = time.perf_counter()
+        resultados_metar, _ = self._motor(estacoes_por_requisicao=1, timeout=0.3).obter_lote(
+            ["SBGR", ESTACAO_LENTA])
+        
+        self.assertLess(time.perf_counter() - inicio, ATRASO_LENTA)
+        self.assertTrue(resultados_metar["SBGR"]["sucesso"])
+        self.assertEqual(resultados_metar[ESTACAO_LENTA],
+                         {"sucesso": False, "erro": "Tempo esgotado"})
+    
+    def test_cancelar(self):
+        motor = self._motor(timeout=10)
+        resultado = {}
+        consulta = threading.Thread(target=lambda: resultado.update(lote=motor.obter_lote([ESTACAO_LENTA])))
+        consulta.start()
+        
+        limite = time.monotonic() + 5
+        while motor.estatisticas()["consultas_em_andamento"] == 0 and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertEqual(motor.cancelar(), 1)
+        consulta.join(ATRASO_LENTA)
+        
+        self.assertFalse(consulta.is_alive())
+        resultados_metar, resultados_taf = resultado["lote"]
+        self.assertEqual(resultados_metar[ESTACAO_LENTA], {"sucesso": False, "erro": "Consulta cancelada"})
+        self.assertEqual(resultados_taf[ESTACAO_LENTA], {"sucesso": False, "erro": "Consulta cancelada"})
+    
+    def test_encerrar_fecha_o_loop(self):
+        motor = self._motor()
+        motor.obter_lote(["SBGR"])
+        motor.encerrar()
+        self.motores.remove(motor)
+        
+        self.assertTrue(motor._loop.is_closed())
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
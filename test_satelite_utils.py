@@ -0,0 +1,175 @@
+"""
+test_satelite_utils.py - Testes da busca direta de imagens de satélite contra um servidor HTTP local
+e do agrupamento das células de tempestade
+
+O servidor de teste responde /GOES/{regiao}/{produto}/{data} com a imagem
+crua, um data URI, JSON com base64 ou erro 500, conforme a região.
+    
+    python -m unittest test_satelite_utils
+"""
+import base64
+import json
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest import mock
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import satelite_utils
+
+TAMANHO_IMAGEM = (40, 30)
+
+def _png(cor):
+    saida = BytesIO()
+    Image.new("RGB", TAMANHO_IMAGEM, cor).save(saida, format="PNG")
+    return saida.getvalue()
+
+PNG = _png((200, 20, 20))
+DATA_URI = "data:image/png;base64," + base64.b64encode(PNG).decode()
+
+# Região -> (Content-Type, corpo); regiões fora daqui respondem 500
+RESPOSTAS = {
+    "BR": ("image/png", PNG),
+    "CO": ("text/plain", DATA_URI.encode()),
+    "NE": ("application/json", json.dumps({"dados": [{"base64": base64.b64encode(PNG).decode()}]}).encode()),
+}
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        _, _, regiao, produto, data = self.path.split("/")
+        self.server.requisicoes.append((regiao, produto, data))
+        
+        if regiao not in RESPOSTAS:
+            self.send_error(500)
+            return
+        tipo, corpo = RESPOSTAS[regiao]
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, *args):
+        pass
+
+def _navegador_falso(regioes, pool=None):
+    # No lugar de capturar_regioes_com_selenium: marca a imagem como vinda do navegador
+    for regiao in regioes:
+        yield regiao, "navegador"
+
+class _PoolFalso:
+    # No lugar do PoolNavegadores: só registra se algum navegador foi pedido
+    def __init__(self):
+        self.usos = 0
+    
+    @contextmanager
+    def navegador(self):
+        self.usos += 1
+        raise RuntimeError("navegador não deveria ser usado")
+        yield
+
+class TestBuscaDireta(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.servidor.daemon_threads = True
+        cls.servidor.requisicoes = []
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.servidor.server_address[1]}/GOES/{{regiao}}/{{produto}}/{{data}}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+    
+    def setUp(self):
+        self.servidor.requisicoes.clear()
+    
+    def test_formatos_de_resposta(self):
+        for regiao in RESPOSTAS:
+            with self.subTest(regiao=regiao):
+                imagem = satelite_utils.obter_imagem_direta(regiao, url=self.url)
+                self.assertEqual(imagem.size, TAMANHO_IMAGEM)
+                self.assertEqual(imagem.getpixel((0, 0)), (200, 20, 20))
+        
+        regiao, produto, data = self.servidor.requisicoes[0]
+        self.assertEqual((regiao, produto, len(data)), ("BR", "TN", len("AAAA-MM-DD")))
+    
+    def test_erro_sem_nova_tentativa(self):
+        inicio = time.perf_counter()
+        with self.assertRaises(ValueError):
+            satelite_utils.obter_imagem_direta("N", url=self.url)
+        
+        self.assertEqual(len(self.servidor.requisicoes), 1)
+        self.assertLess(time.perf_counter() - inicio, 1)
+    
+    def test_desativada_sem_url(self):
+        with mock.patch.object(satelite_utils, "URL_IMAGEM_DIRETA", None):
+            with self.assertRaises(ValueError):
+                satelite_utils.obter_imagem_direta("BR")
+            with mock.patch.object(satelite_utils, "capturar_regioes_com_selenium", _navegador_falso):
+                resultados = list(satelite_utils.obter_imagens(["BR", "CO"]))
+        
+        self.assertEqual(resultados, [("BR", "navegador"), ("CO", "navegador")])
+        self.assertEqual(self.servidor.requisicoes, [])
+    
+    def test_navegador_so_depois_da_falha(self):
+        with mock.patch.object(satelite_utils, "capturar_regioes_com_selenium", _navegador_falso):
+            resultados = list(satelite_utils.obter_imagens(["BR", "N", "CO"], url=self.url))
+        
+        self.assertEqual(resultados[0][0], "BR")
+        self.assertEqual(resultados[0][1].size, TAMANHO_IMAGEM)
+        self.assertEqual(resultados[1:], [("N", "navegador"), ("CO", "navegador")])
+        self.assertEqual([regiao for regiao, _, _ in self.servidor.requisicoes], ["BR", "N"])
+    
+    def test_navegador_intocado_quando_direta_funciona(self):
+        pool = _PoolFalso()
+        resultados = list(satelite_utils.obter_imagens(["BR", "CO"], pool=pool, url=self.url))
+        
+        self.assertEqual([regiao for regiao, _ in resultados], ["BR", "CO"])
+        self.assertEqual(list(satelite_utils.capturar_regioes_com_selenium([], pool)), [])
+        self.assertEqual(pool.usos, 0)
+
+class TestCelulas(unittest.TestCase):
+    def _mascara_anel(self):
+        # Anel com um núcleo no buraco, mais uma célula solta perto da borda
+        mascara = np.zeros((120, 160), np.uint8)
+        cv2.circle(mascara, (60, 60), 40, 1, 6)
+        cv2.circle(mascara, (60, 60), 8, 1, -1)
+        mascara[5:12, 140:150] = 1
+        return mascara
+    
+    def test_nucleo_dentro_do_anel_nao_vira_celula(self):
+        mascara = self._mascara_anel()
+        dilatada = cv2.dilate(mascara, satelite_utils.KERNEL_CELULAS)
+        contornos, _ = cv2.findContours(dilatada, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        celulas = satelite_utils.extrair_celulas(mascara.astype(bool), np.zeros_like(mascara, bool))
+        
+        self.assertEqual(sorted(map(tuple, celulas[["x", "y", "largura", "altura"]].tolist())),
+                         sorted(cv2.boundingRect(contorno) for contorno in contornos))
+        self.assertEqual(len(celulas), 2)
+    
+    def test_incremental_igual_ao_completo(self):
+        detector = satelite_utils.DetectorIncremental(lado_bloco=16, fracao_maxima=10)
+        quadro = np.zeros((120, 160, 3), np.uint8)
+        quadro[self._mascara_anel() > 0] = (220, 40, 30)
+        detector.detectar(quadro)
+        
+        quadro[56:64, 56:64] = 0  # núcleo some
+        quadro[100:108, 10:18] = (220, 40, 30)  # célula nova fora do anel
+        _, celulas = detector.detectar(quadro)
+        
+        completas = satelite_utils.extrair_celulas(*satelite_utils.detectar_cores(quadro))
+        self.assertEqual(sorted(map(tuple, celulas[["x", "y", "largura", "altura"]].tolist())),
+                         sorted(map(tuple, completas[["x", "y", "largura", "altura"]].tolist())))
+        self.assertEqual(detector.estatisticas()["completos"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file